@@ -1,5 +1,5 @@
 """Flask application factory."""
-from flask import Flask
+from flask import Flask, request
 from app.config import config_by_name
 from app.extensions import db, cache, compress
 import os
@@ -20,6 +20,9 @@ def create_app(config_name=None):
     # Initialize extensions
     db.init_app(app)
     cache.init_app(app)
+    # Before Flask-Compress, so response sizes are measured after compression
+    from app.services.metrics import metrics
+    metrics.init_app(app)
     compress.init_app(app)
     
     # Register blueprints
@@ -27,6 +30,10 @@ def create_app(config_name=None):
     app.register_blueprint(web_bp)
     app.register_blueprint(api_bp, url_prefix='/api')
     
+    # Register CLI commands
+    from app.cli import register_commands
+    register_commands(app)
+    
     # Add static file caching headers
     @app.after_request
     def add_cache_headers(response):
@@ -0,0 +1,295 @@
+"""Cache backends for Flask-Caching."""
+from __future__ import annotations
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask_caching.backends.base import BaseCache
+from werkzeug.utils import import_string
+
+GENERATION_KEY = '_tiered/generation'
+# Keys that only make sense in the shared backend (distributed locks)
+UNTIERED_PREFIXES = ('lock/',)
+
+
+class TieredCache(BaseCache):
+    """Bounded in-process LRU in front of a shared backend (Redis by default).
+
+    Enable with ``CACHE_TYPE = 'app.cache_backends.TieredCache'``. Reads are
+    answered from the local tier while an entry is younger than
+    ``CACHE_LOCAL_TIMEOUT`` seconds; misses fall through to the shared
+    ``CACHE_REMOTE_TYPE`` backend (configured with the usual ``CACHE_*``
+    settings) and are copied into the local tier. Writes go to both tiers.
+
+    Local values are kept pickled, so every hit returns a private copy just
+    like a remote read, without the network round trip. The tier is bounded
+    by ``CACHE_LOCAL_MAX_ITEMS`` and ``CACHE_LOCAL_MAX_BYTES``, evicting the
+    least recently used entries. Keys starting with ``UNTIERED_PREFIXES``
+    (locks) bypass the local tier.
+
+    Deletes, clears and counter updates (the corpus version) bump a
+    generation number in the shared backend. Every process compares it at
+    most once per ``CACHE_LOCAL_SYNC_INTERVAL`` seconds and drops its local
+    tier when it changed; ``CACHE_LOCAL_TIMEOUT`` bounds how long an
+    overwritten key can stay stale in other processes.
+    """
+
+    def __init__(
+        self,
+        remote: BaseCache,
+        default_timeout: int = 300,
+        local_timeout: float = 5.0,
+        max_items: int = 2000,
+        max_bytes: int = 32 * 1024 * 1024,
+        sync_interval: float = 1.0,
+    ) -> None:
+        super().__init__(default_timeout=default_timeout)
+        self.remote = remote
+        self.local_timeout = local_timeout
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.sync_interval = sync_interval
+
+        # key -> (expires_at, pickled value)
+        self._local: 'OrderedDict[str, Tuple[float, bytes]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._generation: Any = None
+        self._synced_at = 0.0
+        self._stats = {
+            'local': {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'flushes': 0},
+            'remote': {'hits': 0, 'misses': 0},
+        }
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        remote_type = config.get('CACHE_REMOTE_TYPE', 'RedisCache')
+        if '.' not in remote_type:
+            remote_type = f'flask_caching.backends.{remote_type}'
+        remote = import_string(remote_type).factory(app, config, list(args), dict(kwargs))
+        return cls(
+            remote,
+            default_timeout=kwargs.get('default_timeout', 300),
+            local_timeout=config.get('CACHE_LOCAL_TIMEOUT', 5.0),
+            max_items=config.get('CACHE_LOCAL_MAX_ITEMS', 2000),
+            max_bytes=config.get('CACHE_LOCAL_MAX_BYTES', 32 * 1024 * 1024),
+            sync_interval=config.get('CACHE_LOCAL_SYNC_INTERVAL', 1.0),
+        )
+
+    # Local tier
+
+    def _sync(self) -> None:
+        """Drop the local tier if another process invalidated shared entries."""
+        now = time.monotonic()
+        if now - self._synced_at < self.sync_interval:
+            return
+        self._synced_at = now
+        try:
+            generation = self.remote.get(GENERATION_KEY)
+        except Exception:
+            generation = None
+        if generation != self._generation:
+            with self._lock:
+                if self._local:
+                    self._local.clear()
+                    self._bytes = 0
+                    self._stats['local']['flushes'] += 1
+            self._generation = generation
+
+    def _bump_generation(self) -> None:
+        generation = self.remote.inc(GENERATION_KEY)
+        if not generation:
+            generation = 1
+            self.remote.set(GENERATION_KEY, generation, timeout=0)
+        # Our own bump needs no flush here (the key was already dropped
+        # locally); a jump of more than one means others bumped too
+        if self._generation is not None and generation == self._generation + 1:
+            self._generation = generation
+
+    def _local_get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                self._stats['local']['misses'] += 1
+                return False, None
+            if entry[0] < time.monotonic():
+                self._discard(key)
+                self._stats['local']['expirations'] += 1
+                self._stats['local']['misses'] += 1
+                return False, None
+            self._local.move_to_end(key)
+            self._stats['local']['hits'] += 1
+            data = entry[1]
+        return True, pickle.loads(data)
+
+    def _local_set(self, key: str, value: Any, timeout: Optional[int]) -> None:
+        try:
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            self._local_delete(key)
+            return
+        ttl = self.local_timeout
+        timeout = self._normalize_timeout(timeout)
+        if timeout > 0:
+            ttl = min(ttl, timeout)
+        if len(data) > self.max_bytes:
+            self._local_delete(key)
+            return
+
+        with self._lock:
+            self._discard(key)
+            self._local[key] = (time.monotonic() + ttl, data)
+            self._bytes += len(data)
+            while len(self._local) > self.max_items or self._bytes > self.max_bytes:
+                oldest = next(iter(self._local))
+                self._discard(oldest)
+                self._stats['local']['evictions'] += 1
+
+    def _discard(self, key: str) -> None:
+        entry = self._local.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def _local_delete(self, key: str) -> None:
+        with self._lock:
+            self._discard(key)
+
+    # Cache API
+
+    def get(self, key: str) -> Any:
+        if key.startswith(UNTIERED_PREFIXES):
+            return self.remote.get(key)
+        self._sync()
+        found, value = self._local_get(key)
+        if found:
+            return value
+        value = self.remote.get(key)
+        if value is None:
+            self._stats['remote']['misses'] += 1
+        else:
+            self._stats['remote']['hits'] += 1
+            self._local_set(key, value, None)
+        return value
+
+    def get_many(self, *keys: str) -> List[Any]:
+        self._sync()
+        values: List[Any] = []
+        missing: List[Tuple[int, str]] = []
+        for key in keys:
+            found, value = self._local_get(key)
+            values.append(value)
+            if not found:
+                missing.append((len(values) - 1, key))
+
+        if missing:
+            fetched = self.remote.get_many(*(key for _, key in missing))
+            for (index, key), value in zip(missing, fetched):
+                if value is None:
+                    self._stats['remote']['misses'] += 1
+                    continue
+                self._stats['remote']['hits'] += 1
+                values[index] = value
+                self._local_set(key, value, None)
+        return values
+
+    def get_dict(self, *keys: str) -> Dict[str, Any]:
+        return dict(zip(keys, self.get_many(*keys)))
+
+    def has(self, key: str) -> bool:
+        if key.startswith(UNTIERED_PREFIXES):
+            return self.remote.has(key)
+        self._sync()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                return True
+        return self.remote.has(key)
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        if key.startswith(UNTIERED_PREFIXES):
+            return self.remote.set(key, value, timeout=timeout)
+        result = self.remote.set(key, value, timeout=timeout)
+        if result:
+            self._local_set(key, value, timeout)
+        else:
+            self._local_delete(key)
+        return result
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        if key.startswith(UNTIERED_PREFIXES):
+            return self.remote.add(key, value, timeout=timeout)
+        result = self.remote.add(key, value, timeout=timeout)
+        if result:
+            self._local_set(key, value, timeout)
+        return result
+
+    def set_many(self, mapping: Dict[str, Any], timeout: Optional[int] = None) -> List[Any]:
+        result = self.remote.set_many(mapping, timeout=timeout)
+        stored = set(result)
+        for key, value in mapping.items():
+            if key in stored:
+                self._local_set(key, value, timeout)
+            else:
+                self._local_delete(key)
+        return result
+
+    def delete(self, key: str) -> bool:
+        if key.startswith(UNTIERED_PREFIXES):
+            return self.remote.delete(key)
+        self._local_delete(key)
+        result = self.remote.delete(key)
+        self._bump_generation()
+        return result
+
+    def delete_many(self, *keys: str) -> List[Any]:
+        for key in keys:
+            self._local_delete(key)
+        result = self.remote.delete_many(*keys)
+        self._bump_generation()
+        return result
+
+    def clear(self) -> bool:
+        with self._lock:
+            self._local.clear()
+            self._bytes = 0
+        result = self.remote.clear()
+        self._bump_generation()
+        return result
+
+    def inc(self, key: str, delta: int = 1) -> Optional[int]:
+        self._local_delete(key)
+        result = self.remote.inc(key, delta=delta)
+        self._bump_generation()
+        return result
+
+    def dec(self, key: str, delta: int = 1) -> Optional[int]:
+        self._local_delete(key)
+        result = self.remote.dec(key, delta=delta)
+        self._bump_generation()
+        return result
+
+    # Introspection
+
+    def stats(self, largest: int = 10) -> Dict:
+        """Hit/miss/eviction counters per tier and what the local tier holds."""
+        with self._lock:
+            entries = sorted(
+                ((key, len(entry[1])) for key, entry in self._local.items()),
+                key=lambda item: -item[1],
+            )
+            local = dict(self._stats['local'])
+            remote = dict(self._stats['remote'])
+        local.update({
+            'items': len(entries),
+            'bytes': sum(size for _, size in entries),
+            'max_items': self.max_items,
+            'max_bytes': self.max_bytes,
+            'largest': entries[:largest],
+        })
+        for tier in (local, remote):
+            lookups = tier['hits'] + tier['misses']
+            tier['hit_ratio'] = round(tier['hits'] / lookups, 4) if lookups else None
+        return {'local': local, 'remote': remote}
@@ -0,0 +1,152 @@
+"""Flask CLI commands for maintaining the phrase dictionary."""
+import click
+from flask import Flask
+
+
+def register_commands(app: Flask) -> None:
+    """Attach maintenance commands to ``app.cli``."""
+
+    @app.cli.command('backfill-slugs')
+    @click.option('--batch-size', default=500, show_default=True, help='Rows per UPDATE batch.')
+    @click.option('--regenerate', is_flag=True, help='Recompute every slug, not only missing ones.')
+    def backfill_slugs(batch_size, regenerate):
+        """Fill the phraseological_dict.slug column from phrases."""
+        from app.services.slug import slug_service
+
+        updated = slug_service.backfill(batch_size=batch_size, regenerate=regenerate)
+        click.echo(f'Updated {updated} slug(s).')
+
+    @app.cli.command('sitemap-build')
+    def sitemap_build():
+        """Rebuild the sitemap index and child sitemaps."""
+        from app.services.sitemap import sitemap_service
+
+        manifest = sitemap_service.build()
+        click.echo(
+            f"Wrote {len(manifest['files'])} sitemap file(s) to {sitemap_service.get_directory()}"
+        )
+
+    @app.cli.command('corpus-bump')
+    def corpus_bump():
+        """Invalidate every corpus-derived cache after editing phrases with raw SQL."""
+        from app.services.corpus import bump_corpus_version
+
+        click.echo(f'Corpus version is now {bump_corpus_version()}.')
+
+    @app.cli.command('load-corpus')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--batch-size', default=500, show_default=True, help='Rows per statement batch.')
+    @click.option('--keep-missing', is_flag=True, help='Do not delete phrases absent from the file.')
+    @click.option('--dry-run', is_flag=True, help='Report the changes without writing them.')
+    def load_corpus(path, batch_size, keep_missing, dry_run):
+        """Sync phraseological_dict with a JSON or NDJSON corpus file."""
+        from app.services.corpus_loader import corpus_loader
+
+        report = corpus_loader.load_file(
+            path, delete=not keep_missing, batch_size=batch_size, dry_run=dry_run
+        )
+        click.echo(
+            f"Read {report['read']} phrase(s), {report['duplicates']} duplicate(s) skipped."
+        )
+        click.echo(
+            f"{'Would insert' if dry_run else 'Inserted'} {report['inserted']}, "
+            f"{'update' if dry_run else 'updated'} {report['updated']}, "
+            f"{'delete' if dry_run else 'deleted'} {report['deleted']}; "
+            f"{report['unchanged']} unchanged ({report['seconds']:.2f} s)."
+        )
+
+    @app.cli.command('recategorize')
+    @click.option('--keywords', 'keywords_path', type=click.Path(exists=True, dir_okay=False),
+                  help='JSON file with a "categories" section of keyword stems.')
+    @click.option('--meanings', is_flag=True, help='Also weigh keywords found in meanings.')
+    @click.option('--only-general', is_flag=True, help='Only re-categorize general/uncategorized phrases.')
+    @click.option('--batch-size', default=500, show_default=True, help='Rows per UPDATE batch.')
+    @click.option('--dry-run', is_flag=True, help='Show the diff without writing it.')
+    @click.option('--show', default=20, show_default=True, help='Changed phrases to list.')
+    def recategorize(keywords_path, meanings, only_general, batch_size, dry_run, show):
+        """Assign categories to phrases from keyword stems."""
+        from app.services.categorizer import categorizer_service
+
+        report = categorizer_service.recategorize(
+            keywords_path=keywords_path,
+            use_meanings=meanings,
+            only_general=only_general,
+            batch_size=batch_size,
+            dry_run=dry_run,
+        )
+        for phrase_id, phrase, old, new in report['changes'][:show]:
+            click.echo(f'{phrase_id:>6}  {phrase}: {old} -> {new}')
+        if len(report['changes']) > show:
+            click.echo(f"... and {len(report['changes']) - show} more")
+        for (old, new), count in report['transitions'].most_common():
+            click.echo(f'{count:>6}  {old} -> {new}')
+
+        timings = ', '.join(f'{step} {ms:.1f} ms' for step, ms in report['timings'].items())
+        click.echo(
+            f"{'Would change' if dry_run else 'Changed'} {len(report['changes'])} of "
+            f"{report['scanned']} phrase(s) ({timings})."
+        )
+
+    @app.cli.command('related-build')
+    @click.option('--top-k', default=5, show_default=True, help='Neighbours stored per phrase.')
+    def related_build(top_k):
+        """Recompute the related-phrases neighbour table."""
+        from app.services.related import related_service
+
+        report = related_service.build(top_k=top_k)
+        timings = ', '.join(f'{step} {ms:.1f} ms' for step, ms in report['timings'].items())
+        click.echo(
+            f"Stored {report['neighbors']} neighbour(s) for {report['phrases']} phrase(s) ({timings})."
+        )
+
+    @app.cli.command('images-build')
+    @click.option('--force', is_flag=True, help='Rebuild variants even for unchanged sources.')
+    def images_build(force):
+        """Create responsive image variants and the image manifest."""
+        from app.services.images import image_service
+
+        try:
+            report = image_service.build(force=force)
+        except RuntimeError as exc:
+            raise click.ClickException(str(exc))
+        click.echo(
+            f"Manifest lists {report['images']} image(s): "
+            f"{report['built']} built, {report['skipped']} unchanged."
+        )
+
+    @app.cli.command('export-static')
+    @click.argument('output_dir', type=click.Path(file_okay=False))
+    @click.option('--force', is_flag=True, help='Render every page even if its inputs are unchanged.')
+    def export_static(output_dir, force):
+        """Render public pages and API JSON into OUTPUT_DIR for nginx."""
+        from app.services.static_export import static_exporter
+
+        report = static_exporter.export(output_dir, force=force)
+        click.echo(
+            f"Exported {report['pages']} page(s) in {report['seconds']:.1f}s: "
+            f"{report['rendered']} rendered, {report['written']} written, "
+            f"{report['unchanged']} unchanged, {report['removed']} removed."
+        )
+        if report['failed']:
+            raise click.ClickException(f"{len(report['failed'])} page(s) failed: "
+                                       + ', '.join(report['failed'][:10]))
+
+    @app.cli.command('cache-warm')
+    @click.option('--stage', 'stages', multiple=True, type=click.Choice(['shared', 'local', 'pages']),
+                  help='Stages to run (repeatable). Default: shared and pages.')
+    @click.option('--top', default=100, show_default=True, help='Phrase pages to render.')
+    @click.option('--workers', default=4, show_default=True, help='Items warmed in parallel.')
+    def cache_warm(stages, top, workers):
+        """Fill the cache with service results, phrase JSON, pages and API responses."""
+        from app.services.warmup import cache_warmer
+
+        # In-memory indexes of this CLI process do not help the web workers
+        results = cache_warmer.warm(stages=stages or ('shared', 'pages'), top=top, workers=workers)
+        for item in results:
+            status = f"FAILED {item['error']}" if item['error'] else ''
+            click.echo(f"{item['ms']:9.1f} ms  {item['stage']:<6}  {item['name']}  {status}".rstrip())
+        failed = sum(1 for item in results if item['error'])
+        click.echo(f"Warmed {len(results) - failed} item(s), {failed} failed, "
+                   f"{sum(item['ms'] for item in results) / 1000:.1f}s of work.")
+        if failed:
+            raise click.ClickException(f'{failed} item(s) failed')
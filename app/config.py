@@ -24,10 +24,56 @@ class Config:
     SQLALCHEMY_ECHO = DEBUG
     
     # Caching settings
-    CACHE_TYPE = 'simple' if ENV == 'development' else 'redis'
+    # Outside development: per-process LRU in front of Redis (app/cache_backends.py)
+    CACHE_TYPE = 'simple' if ENV == 'development' else 'app.cache_backends.TieredCache'
+    CACHE_REMOTE_TYPE = 'RedisCache'
+    CACHE_LOCAL_TIMEOUT = float(os.getenv('CACHE_LOCAL_TIMEOUT', 5))
+    CACHE_LOCAL_MAX_ITEMS = int(os.getenv('CACHE_LOCAL_MAX_ITEMS', 2000))
+    CACHE_LOCAL_MAX_BYTES = int(os.getenv('CACHE_LOCAL_MAX_BYTES', 32 * 1024 * 1024))
+    CACHE_LOCAL_SYNC_INTERVAL = 1.0
     CACHE_DEFAULT_TIMEOUT = 300
+    # Entries kept by the in-process 'simple' cache; per-phrase JSON
+    # fragments need room for the whole corpus
+    CACHE_THRESHOLD = int(os.getenv('CACHE_THRESHOLD', 20000))
     CACHE_REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
     
+    # In-memory corpus indexes (search, text matching)
+    CORPUS_INDEX_CHECK_INTERVAL = int(os.getenv('CORPUS_INDEX_CHECK_INTERVAL', 5))
+    
+    # Search backend: 'index' (in-memory, stemmed, BM25), 'fulltext'
+    # (MySQL FULLTEXT ngram / SQLite FTS5) or 'sql' (ILIKE scan)
+    SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'index')
+    # Search results are counted up to this many; larger totals show as "1000+"
+    SEARCH_TOTAL_CAP = 1000
+    
+    # Most IDs plus slugs accepted by /api/phrases/batch
+    PHRASE_BATCH_LIMIT = 100
+    
+    # Autocomplete prefix index: results kept per prefix, longest precomputed prefix
+    AUTOCOMPLETE_TOP_K = 20
+    AUTOCOMPLETE_MAX_PREFIX = 12
+    
+    # Sitemaps: prebuilt gzipped files (defaults to <instance>/sitemaps)
+    SITEMAP_DIR = os.getenv('SITEMAP_DIR')
+    SITEMAP_CHUNK_SIZE = 10000
+    
+    # Keyword stems for the categorizer (defaults to table_phrases_semantic_fixed.json)
+    CATEGORY_KEYWORDS_PATH = os.getenv('CATEGORY_KEYWORDS_PATH')
+    
+    # Full-page cache for anonymous views (HTML stored with gzip/brotli bodies)
+    PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'true').lower() == 'true'
+    
+    # Build in-memory indexes in each gunicorn worker before it serves (gunicorn.conf.py)
+    CACHE_WARM_ON_START = os.getenv('CACHE_WARM_ON_START', 'false').lower() == 'true'
+    
+    # Server-Timing headers and Prometheus metrics at /api/metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    # /api/metrics needs this bearer token, or else a direct request from these addresses
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    METRICS_ALLOWED_IPS = tuple(
+        ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()
+    )
+    
     # Compression settings
     COMPRESS_MIN_SIZE = 500
     COMPRESS_LEVEL = 6
@@ -37,6 +83,8 @@ class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
     TESTING = False
+    # Templates change while developing
+    PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'false').lower() == 'true'
 
 
 class ProductionConfig(Config):
@@ -48,7 +96,7 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URL', 'sqlite:///:memory:')
     CACHE_TYPE = 'simple'
     WTF_CSRF_ENABLED = False
 
@@ -1,5 +1,7 @@
 """SQLAlchemy models for the application."""
 from slugify import slugify
+from sqlalchemy.orm import Session
+
 from app.extensions import db
 
 
@@ -10,19 +12,29 @@ class PhraseologicalEntry(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     phrase = db.Column(db.String(500), nullable=False, unique=True, index=True)
+    slug = db.Column(db.String(255), nullable=True, unique=True, index=True)
     meanings = db.Column(db.JSON, nullable=True)
     etymology = db.Column(db.Text, nullable=True)
     category = db.Column(db.String(100), nullable=True, index=True)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
     
+    # Keys of ``to_dict()``; the fields API clients may project on
+    API_FIELDS = ('id', 'phrase', 'meanings', 'etymology', 'category', 'slug')
+    
     def __repr__(self):
         return f'<PhraseologicalEntry {self.phrase}>'
     
-    @property
-    def slug(self):
-        """Generate a URL-safe slug from the phrase."""
-        return slugify(self.phrase)
+    @staticmethod
+    def make_slug(phrase, taken=()):
+        """Generate a URL-safe slug from the phrase that is not in ``taken``."""
+        base = slugify(phrase)[:240] or 'frazeologizm'
+        slug = base
+        suffix = 2
+        while slug in taken:
+            slug = f'{base}-{suffix}'
+            suffix += 1
+        return slug
     
     def to_dict(self):
         """Convert model to dictionary."""
@@ -44,20 +56,65 @@ class PhraseologicalEntry(db.Model):
         return query.all()
     
     @classmethod
-    def search(cls, query_text, limit=20):
-        """Search for entries by phrase or meaning."""
-        from sqlalchemy import or_
-        return cls.query.filter(
-            or_(
-                cls.phrase.ilike(f'%{query_text}%'),
-                db.cast(cls.meanings, db.Text).ilike(f'%{query_text}%'),
-                cls.etymology.ilike(f'%{query_text}%')
+    def get_by_ids(cls, ids):
+        """Get entries by ID in the order of ``ids``, skipping missing ones."""
+        if not ids:
+            return []
+        by_id = {entry.id: entry for entry in cls.query.filter(cls.id.in_(ids))}
+        return [by_id[entry_id] for entry_id in ids if entry_id in by_id]
+    
+    @classmethod
+    def get_columns_by_ids(cls, ids, fields):
+        """Rows of ``(id, *fields)`` for ``ids`` in that order, without loading entries."""
+        if not ids:
+            return []
+        columns = [cls.id] + [getattr(cls, field) for field in fields]
+        by_id = {row[0]: row for row in db.session.query(*columns).filter(cls.id.in_(ids))}
+        return [by_id[entry_id] for entry_id in ids if entry_id in by_id]
+    
+
+class PhraseNeighbor(db.Model):
+    """Precomputed most similar phrases, ``rank`` 0 being the closest."""
+    
+    __tablename__ = 'phrase_neighbors'
+    
+    phrase_id = db.Column(
+        db.Integer, db.ForeignKey('phraseological_dict.id', ondelete='CASCADE'), primary_key=True
+    )
+    rank = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    neighbor_id = db.Column(
+        db.Integer, db.ForeignKey('phraseological_dict.id', ondelete='CASCADE'), nullable=False
+    )
+    score = db.Column(db.Float, nullable=False)
+    
+    def __repr__(self):
+        return f'<PhraseNeighbor {self.phrase_id}#{self.rank} -> {self.neighbor_id}>'
+
+
+@db.event.listens_for(Session, 'before_flush')
+def assign_phrase_slugs(session, flush_context, instances):
+    """Fill ``slug`` for new entries and entries whose phrase changed."""
+    pending = [
+        obj for obj in list(session.new) + list(session.dirty)
+        if isinstance(obj, PhraseologicalEntry)
+        and obj.phrase
+        and (not obj.slug or db.inspect(obj).attrs.phrase.history.has_changes())
+    ]
+    if not pending:
+        return
+
+    with session.no_autoflush:
+        for obj in pending:
+            base = PhraseologicalEntry.make_slug(obj.phrase)
+            taken = {
+                slug for slug, in session.query(PhraseologicalEntry.slug).filter(
+                    PhraseologicalEntry.slug.like(f'{base}%'),
+                    PhraseologicalEntry.id != obj.id if obj.id else db.true(),
+                )
+            }
+            # Slugs handed out earlier in this flush are not in the table yet.
+            taken.update(
+                other.slug for other in pending
+                if other is not obj and other.slug and other.slug.startswith(base)
             )
-        ).order_by(
-            # Exact phrase match first
-            cls.phrase.ilike(f'%{query_text}%').desc(),
-            # Then by phrase length (shorter phrases first)
-            db.func.length(cls.phrase).asc(),
-            # Then alphabetically
-            cls.phrase.asc()
-        ).limit(limit).all()
+            obj.slug = PhraseologicalEntry.make_slug(obj.phrase, taken)
@@ -1,69 +1,164 @@
 """API routes for phraseological data."""
-from flask import Blueprint, jsonify, request, make_response
-from sqlalchemy import func
+from flask import Blueprint, abort, current_app, jsonify, request, make_response
 import random
 
 from app.extensions import cache, db
 from app.models import PhraseologicalEntry
+from app.services.autocomplete import autocomplete_service
 from app.services.categories import category_service
+from app.services.corpus import VERSIONED_CACHE_TIMEOUT, versioned_request_key
+from app.services.metrics import metrics
+from app.services.pagination import InvalidCursor, decode_cursor, encode_cursor
+from app.services.payloads import dumps, json_response, payload_service
+from app.services.phrase_ids import phrase_id_service
+from app.services.quiz import quiz_service
+from app.services.search import search_service
+from app.services.slug import slug_service
 
 api_bp = Blueprint('api', __name__)
 
 
+def _is_unseeded_random():
+    """True for ``random=true`` requests without a ``seed`` parameter."""
+    return (
+        request.args.get('random', 'false').lower() == 'true'
+        and request.args.get('seed', type=int) is None
+    )
+
+
 @api_bp.route('/phrases', methods=['GET'])
-@cache.cached(timeout=300, query_string=True)
+@cache.cached(
+    timeout=VERSIONED_CACHE_TIMEOUT,
+    make_cache_key=versioned_request_key(query_string=True),
+    unless=_is_unseeded_random,
+)
 def get_phrases():
     """Get all phrases with optional filtering for trainer compatibility."""
     category = request.args.get('category')
     limit = request.args.get('limit', type=int)
     offset = request.args.get('offset', 0, type=int)
+    cursor = request.args.get('cursor')
     random_flag = request.args.get('random', 'false').lower() == 'true'
+    seed = request.args.get('seed', type=int)
+    output_format = request.args.get('format', 'objects')
+    try:
+        fields = payload_service.parse_fields(request.args.get('fields'))
+    except ValueError as exc:
+        return jsonify({'phrases': [], 'error': str(exc)}), 400
+    if output_format not in ('objects', 'columnar'):
+        return jsonify({'phrases': [], 'error': 'Unknown format'}), 400
+    # Full objects come from cached JSON fragments; projections read only
+    # the requested columns
+    projected = fields is not None or output_format == 'columnar'
+    fields = fields or PhraseologicalEntry.API_FIELDS
+    columns = [f for f in fields if f != 'id'] if projected else []
 
-    query = PhraseologicalEntry.query
-
-    if category:
-        query = query.filter_by(category=category)
+    # Totals come from the maintained per-category ID arrays, not COUNT(*)
+    total = phrase_id_service.count(category)
+    next_cursor = None
 
-    total = query.count()
-    
-    # Handle random ordering
+    # Handle random ordering by sampling the in-memory ID array, not ORDER BY RAND()
     if random_flag:
-        phrases = query.order_by(func.random()).limit(limit or 20).all()
+        ids = phrase_id_service.sample(category, limit or 20, seed=seed)
+        rows = PhraseologicalEntry.get_columns_by_ids(ids, columns) if projected else []
     else:
-        phrases = query.offset(offset).limit(limit or 20).all()
+        query = db.session.query(
+            PhraseologicalEntry.id, *(getattr(PhraseologicalEntry, f) for f in columns)
+        )
+        if category:
+            query = query.filter_by(category=category)
+
+        # Keyset pagination on the primary key; offset is kept for old clients
+        if cursor:
+            try:
+                after = int(decode_cursor(cursor)['after'])
+            except (InvalidCursor, KeyError, TypeError, ValueError):
+                return jsonify({'phrases': [], 'error': 'Invalid cursor'}), 400
+            query = query.filter(PhraseologicalEntry.id > after)
+            offset = None
+        query = query.order_by(PhraseologicalEntry.id)
+        if offset:
+            query = query.offset(offset)
+
+        rows = query.limit((limit or 20) + 1).all()
+        if len(rows) > (limit or 20):
+            rows = rows[:limit or 20]
+            next_cursor = encode_cursor({'after': rows[-1][0]})
+        ids = [row[0] for row in rows]
 
     # Create response with Cache-Control headers
-    response = make_response(jsonify({
-        'phrases': [p.to_dict() for p in phrases],
+    payload = {
         'total': total,
         'limit': limit or 20,
         'offset': offset,
-    }))
+    }
+    if random_flag and seed is not None:
+        payload['seed'] = seed
+    if not random_flag:
+        payload['next'] = next_cursor
+    if projected:
+        response = json_response(dumps({
+            'phrases': payload_service.project(rows, fields, columnar=output_format == 'columnar'),
+            'fields': list(fields),
+            **payload,
+        }))
+    else:
+        response = payload_service.response(payload_service.get_fragments(ids), **payload)
     
-    # Set cache headers for trainer compatibility
-    response.cache_control.max_age = 300
-    response.cache_control.public = True
+    # Set cache headers for trainer compatibility; an unseeded random
+    # selection must not be shared between clients
+    if _is_unseeded_random():
+        response.cache_control.no_store = True
+    else:
+        response.cache_control.max_age = 300
+        response.cache_control.public = True
     
     return response
 
 
 @api_bp.route('/phrases/search', methods=['GET'])
-@cache.cached(timeout=180, query_string=True)
+@cache.cached(timeout=VERSIONED_CACHE_TIMEOUT, make_cache_key=versioned_request_key(query_string=True))
 def search_phrases():
     """Search for phrases with autocomplete support."""
     q = request.args.get('q', '')
     limit = request.args.get('limit', 20, type=int)
+    cursor = request.args.get('cursor')
+    fuzzy = request.args.get('fuzzy', 'false').lower() == 'true'
 
     if not q or len(q) < 2:
         return jsonify({'phrases': [], 'error': 'Query must be at least 2 characters'}), 400
 
-    results = PhraseologicalEntry.search(q, limit=limit)
+    # Search results are ranked, not ordered by a column, so the cursor
+    # records the position in the ranking for this query
+    offset = 0
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+            if position.get('q') != q:
+                raise InvalidCursor('Cursor belongs to another query')
+            offset = int(position['offset'])
+        except (InvalidCursor, KeyError, TypeError, ValueError):
+            return jsonify({'phrases': [], 'error': 'Invalid cursor'}), 400
+
+    results, total = search_service.search_phrases(
+        q, limit=limit, offset=offset, backend='fuzzy' if fuzzy else None
+    )
+    cap = current_app.config.get('SEARCH_TOTAL_CAP')
+    next_offset = offset + len(results)
+    has_more = next_offset < total or (cap and total >= cap and len(results) == limit)
 
     # Create response with Cache-Control headers
-    response = make_response(jsonify({
-        'phrases': [p.to_dict() for p in results],
+    payload = {
         'query': q,
-    }))
+        'total': total,
+        'total_capped': bool(cap and total >= cap),
+        'next': encode_cursor({'q': q, 'offset': next_offset}) if has_more else None,
+    }
+    if total == 0 and not fuzzy:
+        payload['did_you_mean'] = [
+            {'phrase': p.phrase, 'slug': p.slug} for p in search_service.suggest_corrections(q)
+        ]
+    response = payload_service.response(payload_service.fragments_for(results), **payload)
     
     # Set cache headers for autocomplete
     response.cache_control.max_age = 180
@@ -72,28 +167,59 @@ def search_phrases():
     return response
 
 
+@api_bp.route('/phrases/batch', methods=['GET'])
+def get_phrases_batch():
+    """Get several phrases by ID and/or slug in request order."""
+    def split(name):
+        values = (v.strip() for arg in request.args.getlist(name) for v in arg.split(','))
+        return list(dict.fromkeys(v for v in values if v))
+
+    slugs = split('slugs')
+    try:
+        ids = [int(value) for value in split('ids')]
+    except ValueError:
+        return jsonify({'phrases': [], 'error': 'IDs must be integers'}), 400
+    if not ids and not slugs:
+        return jsonify({'phrases': [], 'error': 'Pass ids and/or slugs'}), 400
+    batch_limit = current_app.config.get('PHRASE_BATCH_LIMIT', 100)
+    if len(ids) + len(slugs) > batch_limit:
+        return jsonify({'phrases': [], 'error': f'At most {batch_limit} items per request'}), 400
+
+    by_id, by_slug = payload_service.get_batch(ids, slugs)
+    fragments = [by_id[i] for i in ids if i in by_id] + [by_slug[s] for s in slugs if s in by_slug]
+    response = payload_service.response(fragments, missing={
+        'ids': [i for i in ids if i not in by_id],
+        'slugs': [s for s in slugs if s not in by_slug],
+    })
+
+    response.cache_control.max_age = 300
+    response.cache_control.public = True
+    
+    return response
+
+
 @api_bp.route('/phrases/<int:phrase_id>', methods=['GET'])
-@cache.cached(timeout=3600)
+@cache.cached(timeout=VERSIONED_CACHE_TIMEOUT, make_cache_key=versioned_request_key())
 def get_phrase(phrase_id):
     """Get a single phrase by ID."""
-    phrase = PhraseologicalEntry.query.get_or_404(phrase_id)
-    return jsonify(phrase.to_dict())
+    fragments = payload_service.get_fragments([phrase_id])
+    if not fragments:
+        abort(404)
+    return json_response(fragments[0])
 
 
 @api_bp.route('/phrases/slug/<slug>', methods=['GET'])
-@cache.cached(timeout=3600)
+@cache.cached(timeout=VERSIONED_CACHE_TIMEOUT, make_cache_key=versioned_request_key())
 def get_phrase_by_slug(slug):
     """Get a phrase by its slug."""
-    # Since slugs are generated from the phrase, we need to search
-    phrases = PhraseologicalEntry.query.all()
-    for phrase in phrases:
-        if phrase.slug == slug:
-            return jsonify(phrase.to_dict())
-    return jsonify({'error': 'Phrase not found'}), 404
+    phrase = slug_service.get_phrase_by_slug(slug)
+    if phrase is None:
+        return jsonify({'error': 'Phrase not found'}), 404
+    return json_response(payload_service.fragments_for([phrase])[0])
 
 
 @api_bp.route('/categories', methods=['GET'])
-@cache.cached(timeout=3600)
+@cache.cached(timeout=VERSIONED_CACHE_TIMEOUT, make_cache_key=versioned_request_key())
 def get_categories():
     """Get all available categories with enriched metadata for trainer."""
     # Get enriched categories from the category service
@@ -113,7 +239,7 @@ def get_categories():
         })
 
     # Create response with Cache-Control headers
-    response = make_response(jsonify({
+    response = json_response(dumps({
         'categories': categories_data,
     }))
     
@@ -125,7 +251,6 @@ def get_categories():
 
 
 @api_bp.route('/search', methods=['GET'])
-@cache.cached(timeout=180, query_string=True)
 def search_autocomplete():
     """Search endpoint for autocomplete functionality."""
     q = request.args.get('q', '')
@@ -134,19 +259,8 @@ def search_autocomplete():
     if not q or len(q) < 2:
         return jsonify({'results': [], 'error': 'Query must be at least 2 characters'}), 400
 
-    # Search in phrases and meanings
-    results = PhraseologicalEntry.search(q, limit=limit)
-    
-    # Format for autocomplete
-    autocomplete_results = []
-    for phrase in results:
-        autocomplete_results.append({
-            'id': phrase.id,
-            'phrase': phrase.phrase,
-            'category': phrase.category,
-            'slug': phrase.slug,
-            'meanings': phrase.meanings or [],
-        })
+    # Answered from the in-memory prefix index, already in autocomplete format
+    autocomplete_results = autocomplete_service.suggest(q, limit=limit)
 
     # Create response with Cache-Control headers
     response = make_response(jsonify({
@@ -161,16 +275,65 @@ def search_autocomplete():
     return response
 
 
+@api_bp.route('/quiz', methods=['GET'])
+@cache.cached(
+    timeout=VERSIONED_CACHE_TIMEOUT,
+    make_cache_key=versioned_request_key(query_string=True),
+    unless=lambda: request.args.get('seed', type=int) is None,
+)
+def get_quiz():
+    """Get a batch of ready-made quiz questions for the trainer."""
+    category = request.args.get('category')
+    count = max(1, min(request.args.get('count', 10, type=int), 50))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    seed = request.args.get('seed', type=int)
+    seeded = seed is not None
+    if not seeded:
+        seed = random.randrange(2 ** 31)
+
+    quiz = quiz_service.get_questions(category, seed=seed, offset=offset, count=count)
+
+    # Create response with Cache-Control headers
+    response = make_response(jsonify(quiz))
+    
+    # A (category, seed, offset, count) batch never changes, so let clients cache it
+    if seeded:
+        response.cache_control.max_age = 300
+        response.cache_control.public = True
+    else:
+        response.cache_control.no_store = True
+    
+    return response
+
+
+@api_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics of the worker answering the request."""
+    if not current_app.config.get('METRICS_ENABLED', True):
+        abort(404)
+    if not metrics.authorized():
+        abort(403)
+    response = make_response(metrics.render())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.cache_control.no_store = True
+    return response
+
+
 @api_bp.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
     try:
         count = PhraseologicalEntry.query.count()
-        return jsonify({
+        payload = {
             'status': 'healthy',
             'database': 'connected',
             'phrases_count': count,
-        })
+        }
+        # Per-worker tier counters of the layered cache backend; they name
+        # cache keys, so only for callers allowed to read /api/metrics
+        if hasattr(cache.cache, 'stats') and metrics.authorized():
+            payload['cache'] = cache.cache.stats(largest=5)
+        return jsonify(payload)
     except Exception as exc:  # pragma: no cover - defensive logging
         return jsonify({
             'status': 'unhealthy',
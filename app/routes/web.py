@@ -1,16 +1,22 @@
 """Web routes for serving dynamic category pages."""
-from flask import Blueprint, render_template, abort, send_from_directory, request, redirect, url_for
+from flask import Blueprint, current_app, render_template, abort, send_from_directory, request, redirect, url_for, make_response
+from datetime import datetime
+import gzip
 import os
 from app.services.categories import category_service
+from app.services.images import image_service
+from app.services.page_cache import page_cache
+from app.services.related import related_service
 from app.services.slug import slug_service
 from app.services.search import search_service
 from app.services.seo import seo_service
-from app.models import PhraseologicalEntry
+from app.services.sitemap import sitemap_service
 
 web_bp = Blueprint('web', __name__)
 
 
 @web_bp.route('/')
+@page_cache.cached()
 def home():
     general_category = category_service.get_general_category()
     categories = category_service.get_navigation_categories()
@@ -31,6 +37,7 @@ def home():
 
 
 @web_bp.route('/kategoria/<category_slug>/')
+@page_cache.cached()
 def category_page(category_slug):
     category = category_service.get_category_by_slug(category_slug)
     if not category:
@@ -53,6 +60,7 @@ def category_page(category_slug):
 
 
 @web_bp.route('/frazeologizm/<phrase_slug>/')
+@page_cache.cached()
 def phrase_detail(phrase_slug):
     """Phrase detail page."""
     phrase = slug_service.get_phrase_by_slug(phrase_slug)
@@ -61,28 +69,15 @@ def phrase_detail(phrase_slug):
     
     categories = category_service.get_navigation_categories()
     
-    # Get related phrases from same category
-    related_phrases = []
-    if phrase.category:
-        related_phrases = PhraseologicalEntry.query.filter(
-            PhraseologicalEntry.category == phrase.category,
-            PhraseologicalEntry.id != phrase.id
-        ).limit(5).all()
+    # Related phrases come from the precomputed neighbour table
+    related_phrases = related_service.get_related(phrase, limit=5)
     
-    # Check for image files
-    image_extensions = ['webp', 'jpg', 'jpeg', 'png']
-    phrase_image = None
-    for ext in image_extensions:
-        image_path = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)), 
-            'static', 'images', f'{phrase_slug}.{ext}'
-        )
-        if os.path.exists(image_path):
-            phrase_image = f'images/{phrase_slug}.{ext}'
-            break
+    # Image and its variants come from the per-worker manifest, not the filesystem
+    image = image_service.get_image(phrase.slug)
+    phrase_image = image['src'] if image else None
     
     # SEO metadata
-    seo_meta = seo_service.get_phrase_metadata(phrase, phrase_image)
+    seo_meta = seo_service.get_phrase_metadata(phrase, phrase_image, og_image=image and image.get('og'))
     structured_data = seo_service.get_phrase_structured_data(phrase, phrase_image)
     
     return render_template(
@@ -91,6 +86,7 @@ def phrase_detail(phrase_slug):
         categories=categories,
         related_phrases=related_phrases,
         phrase_image=phrase_image,
+        image=image,
         seo_meta=seo_meta,
         structured_data=structured_data,
         breadcrumbs=[
@@ -113,6 +109,7 @@ def search():
     results = []
     total = 0
     pagination = None
+    suggestions = []
     
     if query and len(query) >= 2:
         offset = (page - 1) * per_page
@@ -122,19 +119,30 @@ def search():
             offset=offset
         )
         
-        # Simple pagination
-        has_next = offset + per_page < total
+        # Simple pagination; totals beyond SEARCH_TOTAL_CAP are not counted
+        total_cap = current_app.config.get('SEARCH_TOTAL_CAP')
+        total_capped = bool(total_cap and total >= total_cap)
+        # Past the cap, a full page means there may be more (as in the API)
+        has_next = offset + per_page < total or (total_capped and len(results) == per_page)
         has_prev = page > 1
+        pages = (total + per_page - 1) // per_page
+        if total_capped:
+            pages = max(pages, page + 1 if has_next else page)
         pagination = {
             'page': page,
             'per_page': per_page,
             'total': total,
-            'pages': (total + per_page - 1) // per_page,
+            'total_capped': total_capped,
+            'pages': pages,
             'has_next': has_next,
             'has_prev': has_prev,
             'next_num': page + 1 if has_next else None,
             'prev_num': page - 1 if has_prev else None,
         }
+        
+        # Nothing matched as typed: offer close phrases from the trigram index
+        if total == 0:
+            suggestions = search_service.suggest_corrections(query)
     
     # SEO metadata
     seo_meta = seo_service.get_search_metadata(query)
@@ -145,6 +153,8 @@ def search():
         results=results,
         categories=categories,
         pagination=pagination,
+        suggestions=suggestions,
+        search_service=search_service,
         seo_meta=seo_meta,
         breadcrumbs=[
             {'url': '/', 'title': 'Главная'},
@@ -192,67 +202,41 @@ def search_in_text():
 
 @web_bp.route('/sitemap.xml')
 def sitemap():
-    """Generate dynamic sitemap.xml."""
-    from flask import Response, make_response
-    from app.extensions import cache
-    from datetime import datetime
+    """Serve the sitemap index."""
+    return _send_sitemap('sitemap.xml')
+
+
+@web_bp.route('/sitemap-<part>.xml')
+def sitemap_part(part):
+    """Serve a child sitemap (pages or a chunk of phrase pages)."""
+    return _send_sitemap(f'sitemap-{part}.xml')
+
+
+def _send_sitemap(name):
+    """Send a prebuilt gzipped sitemap, decompressing only for clients without gzip."""
+    found = sitemap_service.get_file(name)
+    if not found:
+        abort(404)
+    path, manifest = found
     
-    @cache.memoize(timeout=3600)
-    def generate_sitemap():
-        """Generate sitemap content with caching."""
-        site_url = os.getenv('SITE_URL', 'https://frazeologizm.ru')
-        
-        urls = []
-        
-        # Home page
-        urls.append({
-            'loc': site_url + '/',
-            'lastmod': datetime.now().strftime('%Y-%m-%d'),
-            'changefreq': 'daily',
-            'priority': '1.0'
-        })
-        
-        # Category pages
-        categories = category_service.get_all_categories_enriched()
-        for cat in categories:
-            urls.append({
-                'loc': site_url + f'/kategoria/{cat["slug"]}/',
-                'lastmod': datetime.now().strftime('%Y-%m-%d'),
-                'changefreq': 'weekly',
-                'priority': '0.8'
-            })
-        
-        # Phrase detail pages
-        phrases = PhraseologicalEntry.query.all()
-        for phrase in phrases:
-            lastmod = phrase.updated_at.strftime('%Y-%m-%d') if phrase.updated_at else datetime.now().strftime('%Y-%m-%d')
-            urls.append({
-                'loc': site_url + f'/frazeologizm/{phrase.slug}/',
-                'lastmod': lastmod,
-                'changefreq': 'monthly',
-                'priority': '0.6'
-            })
-        
-        # Generate XML
-        xml = '<?xml version="1.0" encoding="UTF-8"?>\n'
-        xml += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-        
-        for url in urls:
-            xml += '  <url>\n'
-            xml += f'    <loc>{url["loc"]}</loc>\n'
-            xml += f'    <lastmod>{url["lastmod"]}</lastmod>\n'
-            xml += f'    <changefreq>{url["changefreq"]}</changefreq>\n'
-            xml += f'    <priority>{url["priority"]}</priority>\n'
-            xml += '  </url>\n'
-        
-        xml += '</urlset>'
-        
-        return xml
+    with open(path, 'rb') as f:
+        body = f.read()
+    
+    if 'gzip' in request.accept_encodings:
+        response = make_response(body)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(f"{manifest['etag']}-{name}-gz")
+    else:
+        response = make_response(gzip.decompress(body))
+        response.set_etag(f"{manifest['etag']}-{name}")
     
-    sitemap_xml = generate_sitemap()
-    response = make_response(sitemap_xml)
     response.headers['Content-Type'] = 'application/xml; charset=utf-8'
-    return response
+    response.vary.add('Accept-Encoding')
+    if manifest['last_modified']:
+        response.last_modified = datetime.fromisoformat(manifest['last_modified'])
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    return response.make_conditional(request)
 
 
 @web_bp.route('/robots.txt')
@@ -0,0 +1,84 @@
+"""Aho-Corasick automaton for matching many phrases in one pass over a text."""
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Hashable, Iterable, Iterator, List, Tuple
+
+
+class AhoCorasick:
+    """Multi-pattern string matcher.
+
+    Patterns are added once, then ``finditer`` reports every (possibly
+    overlapping) occurrence of every pattern in time linear in the length of
+    the text plus the number of matches.
+    """
+
+    def __init__(self) -> None:
+        # Node 0 is the root. ``_goto[n]`` maps a character to the child node.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[Hashable, int]]] = [[]]
+        self._built = False
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def add(self, pattern: str, key: Hashable) -> None:
+        """Register ``pattern``; matches are reported with ``key``."""
+        if not pattern:
+            return
+        if self._built:
+            raise RuntimeError('Cannot add patterns after the automaton is built')
+
+        node = 0
+        for char in pattern:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][char] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = child
+        self._output[node].append((key, len(pattern)))
+
+    def build(self) -> 'AhoCorasick':
+        """Compute failure links; must be called once after all ``add`` calls."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                # Inherit outputs of the suffix node so lookups need no chain walk.
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+        self._built = True
+        return self
+
+    def finditer(self, text: str) -> Iterator[Tuple[Hashable, int]]:
+        """Yield ``(key, start)`` for every occurrence of every pattern in ``text``."""
+        if not self._built:
+            self.build()
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                for key, length in output[node]:
+                    yield key, index - length + 1
+
+    @classmethod
+    def from_patterns(cls, patterns: Iterable[Tuple[str, Hashable]]) -> 'AhoCorasick':
+        """Build an automaton from ``(pattern, key)`` pairs."""
+        automaton = cls()
+        for pattern, key in patterns:
+            automaton.add(pattern, key)
+        return automaton.build()
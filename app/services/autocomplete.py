@@ -0,0 +1,129 @@
+"""Autocomplete service backed by a precomputed in-memory prefix index."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import PhraseologicalEntry
+from app.services.corpus import CorpusIndex
+from app.services.stemmer import tokenize
+
+
+class PrefixIndex:
+    """Sorted word-suffix keys with precomputed top-k results per prefix.
+
+    Every phrase is indexed once per word, keyed by the text from that word
+    to the end ("водить за нос" → "водить за нос", "за нос", "нос"), so a
+    prefix matches the start of any word inside a phrase. Short prefixes
+    (the common case while typing) are answered from the ``top`` table;
+    longer ones fall back to a binary search over the sorted keys.
+    """
+
+    def __init__(
+        self,
+        entries: List[Dict],
+        top_k: int = 20,
+        max_prefix_length: int = 12,
+    ) -> None:
+        self.entries = entries
+        self.top_k = top_k
+        self.max_prefix_length = max_prefix_length
+
+        # Phrase-initial matches first, then shorter phrases, then alphabetical.
+        order = sorted(range(len(entries)), key=lambda doc: (
+            len(entries[doc]['phrase']), entries[doc]['phrase'].lower()
+        ))
+        self._rank = {doc: rank for rank, doc in enumerate(order)}
+
+        suffixes: List[Tuple[str, Tuple[bool, int], int]] = []
+        for doc, entry in enumerate(entries):
+            words = tokenize(entry['phrase'])
+            for position in range(len(words)):
+                key = ' '.join(words[position:])
+                suffixes.append((key, (position > 0, self._rank[doc]), doc))
+        suffixes.sort()
+
+        self.keys = [key for key, _, _ in suffixes]
+        self._suffixes = suffixes
+
+        candidates: Dict[str, List[Tuple[Tuple[bool, int], int]]] = {}
+        for key, sort_key, doc in suffixes:
+            for length in range(1, min(len(key), max_prefix_length) + 1):
+                candidates.setdefault(key[:length], []).append((sort_key, doc))
+        self.top: Dict[str, Tuple[int, ...]] = {
+            prefix: self._best(items, top_k) for prefix, items in candidates.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def _best(items: List[Tuple[Tuple[bool, int], int]], limit: int) -> Tuple[int, ...]:
+        """Order candidates and keep the first ``limit`` distinct documents."""
+        seen = set()
+        best = []
+        for _, doc in sorted(items):
+            if doc not in seen:
+                seen.add(doc)
+                best.append(doc)
+                if len(best) == limit:
+                    break
+        return tuple(best)
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict]:
+        """Return up to ``limit`` entries with a word starting with ``query``."""
+        prefix = ' '.join(tokenize(query))
+        if not prefix or limit <= 0:
+            return []
+
+        if len(prefix) <= self.max_prefix_length and limit <= self.top_k:
+            docs = self.top.get(prefix, ())[:limit]
+        else:
+            start = bisect_left(self.keys, prefix)
+            end = bisect_left(self.keys, prefix + '\uffff', lo=start)
+            docs = self._best(
+                [(sort_key, doc) for _, sort_key, doc in self._suffixes[start:end]],
+                limit,
+            )
+        return [self.entries[doc] for doc in docs]
+
+
+class AutocompleteService:
+    """Service answering live autocomplete queries from memory."""
+
+    def __init__(self) -> None:
+        self._index = CorpusIndex(self._build_index, name='autocomplete index')
+
+    def _build_index(self) -> PrefixIndex:
+        rows = db.session.query(
+            PhraseologicalEntry.id,
+            PhraseologicalEntry.phrase,
+            PhraseologicalEntry.category,
+            PhraseologicalEntry.slug,
+            PhraseologicalEntry.meanings,
+        ).order_by(PhraseologicalEntry.id)
+        entries = [
+            {
+                'id': phrase_id,
+                'phrase': phrase,
+                'category': category,
+                'slug': slug,
+                'meanings': meanings or [],
+            }
+            for phrase_id, phrase, category, slug, meanings in rows
+        ]
+        return PrefixIndex(
+            entries,
+            top_k=current_app.config.get('AUTOCOMPLETE_TOP_K', 20),
+            max_prefix_length=current_app.config.get('AUTOCOMPLETE_MAX_PREFIX', 12),
+        )
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict]:
+        """Get autocomplete entries for a partially typed query."""
+        return self._index.get().suggest(query, limit)
+
+
+autocomplete_service = AutocompleteService()
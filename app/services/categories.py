@@ -9,6 +9,8 @@ from slugify import slugify
 
 from app.extensions import cache, db
 from app.models import PhraseologicalEntry
+from app.services import single_flight
+from app.services.corpus import VERSIONED_CACHE_TIMEOUT, versioned_name
 
 
 class CategoryService:
@@ -37,7 +39,7 @@ class CategoryService:
     def get_category_config(self, category_key: str) -> Optional[Dict]:
         return self._get_config_categories().get(category_key)
 
-    @cache.memoize(timeout=3600)
+    @cache.memoize(timeout=VERSIONED_CACHE_TIMEOUT, make_name=versioned_name)
     def get_db_categories(self) -> List[Dict]:
         categories = db.session.query(
             PhraseologicalEntry.category,
@@ -50,7 +52,7 @@ class CategoryService:
 
         return [{'name': cat[0], 'count': cat[1]} for cat in categories]
 
-    @cache.memoize(timeout=3600)
+    @cache.memoize(timeout=VERSIONED_CACHE_TIMEOUT, make_name=versioned_name)
     def get_total_phrase_count(self) -> int:
         count = db.session.query(db.func.count(PhraseologicalEntry.id)).scalar()
         return count or 0
@@ -99,7 +101,7 @@ class CategoryService:
             'count': count,
         }
 
-    @cache.memoize(timeout=3600)
+    @single_flight.memoize()
     def get_all_categories_enriched(self) -> List[Dict]:
         db_categories = self.get_db_categories()
         enriched: List[Dict] = []
@@ -115,7 +117,7 @@ class CategoryService:
 
         return sorted(enriched, key=lambda x: x['display_name'])
 
-    @cache.memoize(timeout=600)
+    @cache.memoize(timeout=VERSIONED_CACHE_TIMEOUT, make_name=versioned_name)
     def get_navigation_categories(self) -> List[Dict]:
         categories = []
         general_category = self.get_general_category()
@@ -0,0 +1,151 @@
+"""Keyword categorizer assigning phrase categories from compiled keyword stems."""
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import PhraseologicalEntry
+from app.services.aho_corasick import AhoCorasick
+
+DEFAULT_CATEGORY = 'general'
+# A keyword found in a meaning counts for less than one in the phrase itself.
+MEANING_WEIGHT = 0.5
+
+
+def normalize_keyword_text(text: str) -> str:
+    return text.lower().replace('ё', 'е')
+
+
+class KeywordCategorizer:
+    """All category keyword stems compiled into one Aho-Corasick automaton.
+
+    A keyword matches at the start of a word ("кот" matches "кота" and
+    "котёнок", not "скот"). Each text is scanned once; every hit adds to its
+    category's score, and the best-scoring category wins. Ties go to the
+    category listed first, and texts without hits get ``default``.
+    """
+
+    def __init__(self, keywords: Dict[str, Sequence[str]], default: str = DEFAULT_CATEGORY) -> None:
+        self.categories = list(keywords)
+        self.default = default
+        self._order = {category: index for index, category in enumerate(self.categories)}
+        self._automaton = AhoCorasick.from_patterns(
+            (normalize_keyword_text(keyword), category)
+            for category, stems in keywords.items()
+            for keyword in stems
+            if keyword
+        )
+
+    def scores(self, text: str, weight: float = 1.0, into: Optional[Counter] = None) -> Counter:
+        """Add ``weight`` per word-initial keyword hit in ``text`` to category scores."""
+        scores = into if into is not None else Counter()
+        text = normalize_keyword_text(text)
+        for category, start in self._automaton.finditer(text):
+            if start == 0 or not text[start - 1].isalnum():
+                scores[category] += weight
+        return scores
+
+    def classify(self, phrase: str, meanings: Optional[Iterable[str]] = None) -> str:
+        """Return the category for a phrase, optionally also weighing its meanings."""
+        scores = self.scores(phrase)
+        if meanings:
+            self.scores(' '.join(m for m in meanings if isinstance(m, str)), MEANING_WEIGHT, scores)
+        if not scores:
+            return self.default
+        return min(scores, key=lambda category: (-scores[category], self._order[category]))
+
+    @classmethod
+    def from_file(cls, path: str) -> 'KeywordCategorizer':
+        """Load the ``categories`` section of a corpus JSON file.
+
+        Categories without keywords (like ``general``) are skipped.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        keywords = {
+            category: spec.get('keywords') or []
+            for category, spec in data.get('categories', {}).items()
+            if spec.get('keywords')
+        }
+        return cls(keywords)
+
+
+class CategorizerService:
+    """Service re-categorizing the whole table in one batch."""
+
+    def get_keywords_path(self) -> str:
+        return current_app.config.get('CATEGORY_KEYWORDS_PATH') or os.path.join(
+            os.path.dirname(current_app.root_path), 'table_phrases_semantic_fixed.json'
+        )
+
+    def recategorize(
+        self,
+        keywords_path: Optional[str] = None,
+        use_meanings: bool = False,
+        only_general: bool = False,
+        batch_size: int = 500,
+        dry_run: bool = False,
+    ) -> Dict:
+        """Classify every phrase and write changed categories.
+
+        Returns the changes as ``(id, phrase, old, new)`` tuples, a count per
+        ``(old, new)`` transition, and timings in milliseconds.
+        """
+        timings: Dict[str, float] = {}
+
+        started = time.perf_counter()
+        categorizer = KeywordCategorizer.from_file(keywords_path or self.get_keywords_path())
+        timings['compile'] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        columns = [PhraseologicalEntry.id, PhraseologicalEntry.phrase, PhraseologicalEntry.category]
+        if use_meanings:
+            columns.append(PhraseologicalEntry.meanings)
+        query = db.session.query(*columns).order_by(PhraseologicalEntry.id)
+        if only_general:
+            query = query.filter(db.or_(
+                PhraseologicalEntry.category.is_(None),
+                PhraseologicalEntry.category == DEFAULT_CATEGORY,
+            ))
+        rows = query.all()
+        timings['load'] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        changes: List[tuple] = []
+        for row in rows:
+            category = categorizer.classify(row.phrase, row.meanings if use_meanings else None)
+            if category != row.category:
+                changes.append((row.id, row.phrase, row.category, category))
+        timings['classify'] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        if changes and not dry_run:
+            updates = [{'id': phrase_id, 'category': new} for phrase_id, _, _, new in changes]
+            try:
+                for start in range(0, len(updates), batch_size):
+                    db.session.execute(
+                        db.update(PhraseologicalEntry),
+                        updates[start:start + batch_size],
+                    )
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        timings['write'] = (time.perf_counter() - started) * 1000
+
+        return {
+            'scanned': len(rows),
+            'changes': changes,
+            'transitions': Counter((old, new) for _, _, old, new in changes),
+            'dry_run': dry_run,
+            'timings': timings,
+        }
+
+
+categorizer_service = CategorizerService()
@@ -0,0 +1,181 @@
+"""Per-process indexes derived from the phrase corpus."""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+import weakref
+from typing import Any, Callable, Generic, List, Optional, TypeVar
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy.orm import Session
+
+from app.extensions import cache, db
+from app.models import PhraseologicalEntry
+
+T = TypeVar('T')
+
+CORPUS_VERSION_KEY = 'corpus_version'
+# Entries keyed by the corpus version never serve stale data, so they can
+# live until evicted; the TTL only bounds memory held by old versions.
+VERSIONED_CACHE_TIMEOUT = 24 * 3600
+_CHANGED_FLAG = 'corpus_changed'
+
+
+def get_corpus_version() -> int:
+    """Return the current corpus version, shared through the cache backend.
+
+    A missing version (first start, flushed or evicted cache) is seeded from
+    the clock in milliseconds, so it never falls back to a value that older
+    cache entries were stored under. Within a request the version is read
+    from the backend only once.
+    """
+    if has_request_context() and 'corpus_version' in g:
+        return g.corpus_version
+
+    version = cache.get(CORPUS_VERSION_KEY)
+    if version is None:
+        cache.add(CORPUS_VERSION_KEY, int(time.time() * 1000), timeout=0)
+        version = cache.get(CORPUS_VERSION_KEY) or 0
+    version = int(version)
+
+    if has_request_context():
+        g.corpus_version = version
+    return version
+
+
+def bump_corpus_version() -> int:
+    """Advance the corpus version, invalidating every versioned cache entry."""
+    get_corpus_version()
+    version = cache.cache.inc(CORPUS_VERSION_KEY)
+    if version is None:
+        # Backend error: fall back to a fresh clock-based version
+        version = int(time.time() * 1000)
+        cache.set(CORPUS_VERSION_KEY, version, timeout=0)
+    version = int(version)
+
+    if has_request_context():
+        g.corpus_version = version
+    elif has_app_context():
+        # Requests issued inside this app context (test client) share its ``g``
+        g.pop('corpus_version', None)
+    current_app.logger.debug('Corpus version bumped to %s', version)
+    return version
+
+
+def versioned_name(fname: str) -> str:
+    """``make_name`` for ``cache.memoize`` that ties entries to the corpus version."""
+    return f'{fname}@v{get_corpus_version()}'
+
+
+def versioned_request_key(query_string: bool = False) -> Callable[..., str]:
+    """``make_cache_key`` for ``cache.cached`` views keyed by path and corpus version.
+
+    With ``query_string`` the sorted query arguments are part of the key,
+    like ``cache.cached(query_string=True)``.
+    """
+
+    def make_cache_key(*args, **kwargs) -> str:
+        key = f'view/{request.path}'
+        if query_string:
+            args_as_sorted_tuple = tuple(sorted(request.args.items(multi=True)))
+            key += '?' + hashlib.md5(str(args_as_sorted_tuple).encode('utf-8')).hexdigest()
+        return f'{key}@v{get_corpus_version()}'
+
+    return make_cache_key
+
+
+def _touches_corpus(objects) -> bool:
+    return any(isinstance(obj, PhraseologicalEntry) for obj in objects)
+
+
+@db.event.listens_for(Session, 'after_flush')
+def mark_corpus_flush(session, flush_context):
+    """Remember that the transaction wrote phrase rows through the ORM."""
+    if (_touches_corpus(session.new) or _touches_corpus(session.dirty)
+            or _touches_corpus(session.deleted)):
+        session.info[_CHANGED_FLAG] = True
+
+
+@db.event.listens_for(Session, 'do_orm_execute')
+def mark_corpus_statement(orm_execute_state):
+    """Remember bulk INSERT/UPDATE/DELETE statements against phrase rows."""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update
+            or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, PhraseologicalEntry):
+        orm_execute_state.session.info[_CHANGED_FLAG] = True
+
+
+@db.event.listens_for(Session, 'after_commit')
+def bump_on_corpus_commit(session):
+    """Bump the corpus version once per committed transaction that changed phrases."""
+    if session.info.pop(_CHANGED_FLAG, False):
+        try:
+            bump_corpus_version()
+        except Exception:  # pragma: no cover - the commit itself succeeded
+            current_app.logger.exception('Could not bump the corpus version')
+
+
+@db.event.listens_for(Session, 'after_rollback')
+def reset_corpus_flag(session):
+    session.info.pop(_CHANGED_FLAG, None)
+
+
+class CorpusIndex(Generic[T]):
+    """Lazily built in-memory structure that is rebuilt when the corpus changes.
+
+    Each worker process keeps its own copy. The corpus version is re-checked
+    at most once per ``CORPUS_INDEX_CHECK_INTERVAL`` seconds, so steady-state
+    lookups do not touch the cache backend or the database at all.
+    """
+
+    def __init__(self, builder: Callable[[], T], name: Optional[str] = None) -> None:
+        self.builder = builder
+        self.name = name or getattr(builder, '__name__', 'index')
+        self._value: Optional[T] = None
+        self._version: Any = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        _INDEXES.add(self)
+
+    def _check_interval(self) -> float:
+        return current_app.config.get('CORPUS_INDEX_CHECK_INTERVAL', 5)
+
+    def get(self) -> T:
+        """Return the current structure, rebuilding it if the corpus changed."""
+        now = time.monotonic()
+        if self._value is not None and now - self._checked_at < self._check_interval():
+            return self._value
+
+        with self._lock:
+            if self._value is not None and now - self._checked_at < self._check_interval():
+                return self._value
+
+            version = get_corpus_version()
+            if self._value is None or version != self._version:
+                started = time.perf_counter()
+                self._value = self.builder()
+                self._version = version
+                current_app.logger.debug(
+                    'Built %s in %.1f ms', self.name, (time.perf_counter() - started) * 1000
+                )
+            self._checked_at = time.monotonic()
+            return self._value
+
+    def invalidate(self) -> None:
+        """Drop the cached structure so the next ``get`` rebuilds it."""
+        with self._lock:
+            self._value = None
+            self._version = None
+            self._checked_at = 0.0
+
+
+# Every index created in this process, for warming them up front
+_INDEXES: 'weakref.WeakSet[CorpusIndex]' = weakref.WeakSet()
+
+
+def corpus_indexes() -> List[CorpusIndex]:
+    """Return the ``CorpusIndex`` instances of this process, sorted by name."""
+    return sorted(_INDEXES, key=lambda index: index.name)
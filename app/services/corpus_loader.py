@@ -0,0 +1,229 @@
+"""Bulk loader syncing phraseological_dict with a JSON or NDJSON corpus file."""
+from __future__ import annotations
+
+import json
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from app.extensions import db
+from app.models import PhraseologicalEntry
+
+FIELDS = ('phrase', 'meanings', 'etymology', 'category')
+
+
+def normalize_phrase(phrase: str) -> str:
+    """Key used to match corpus records to rows: case, ё and spacing folded."""
+    return ' '.join(phrase.lower().replace('ё', 'е').split())
+
+
+def iter_corpus(path: str) -> Iterator[Dict]:
+    """Yield raw phrase records from a corpus file.
+
+    ``.ndjson``/``.jsonl`` files are read one record per line. Other files
+    are JSON: either a list of records or an object with a ``phrases`` list,
+    like ``table_phrases_semantic_fixed.json``.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.ndjson', '.jsonl')):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            data = json.load(f)
+            yield from data.get('phrases', []) if isinstance(data, dict) else data
+
+
+def _text(value) -> Optional[str]:
+    """A stripped string field: numbers are kept as text, other non-strings dropped."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = str(value)
+    if not isinstance(value, str):
+        return None
+    return value.strip() or None
+
+
+def clean_record(record: Dict) -> Optional[Dict]:
+    """Coerce a raw record to column values, or ``None`` if it has no phrase."""
+    if not isinstance(record, dict):
+        return None
+    phrase = ' '.join((_text(record.get('phrase')) or '').split())
+    if not phrase:
+        return None
+    meanings = record.get('meanings')
+    if isinstance(meanings, str):
+        meanings = [meanings]
+    elif not isinstance(meanings, list):
+        meanings = None
+    return {
+        'phrase': phrase,
+        'meanings': [m for m in meanings if isinstance(m, str)] if meanings else None,
+        'etymology': _text(record.get('etymology')),
+        'category': _text(record.get('category')),
+    }
+
+
+def _chunks(items: List, size: int) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class CorpusLoader:
+    """Service applying a corpus file to the table as one batched diff.
+
+    Records are matched to rows by :func:`normalize_phrase`. Only rows whose
+    fields differ are written, so loading an unchanged file issues no writes.
+    The commit goes through the session, which bumps the corpus version.
+    """
+
+    def diff(self, records: Iterable[Dict], delete: bool = True) -> Dict:
+        """Compare records with the table and return the planned changes."""
+        incoming: Dict[str, Dict] = {}
+        read = duplicates = 0
+        for raw in records:
+            record = clean_record(raw)
+            if record is None:
+                continue
+            read += 1
+            key = normalize_phrase(record['phrase'])
+            if key in incoming:
+                duplicates += 1
+                continue
+            incoming[key] = record
+
+        rows = db.session.query(
+            PhraseologicalEntry.id,
+            PhraseologicalEntry.phrase,
+            PhraseologicalEntry.slug,
+            PhraseologicalEntry.meanings,
+            PhraseologicalEntry.etymology,
+            PhraseologicalEntry.category,
+        ).order_by(PhraseologicalEntry.id).all()
+
+        existing: Dict[str, List] = {}
+        for row in rows:
+            existing.setdefault(normalize_phrase(row.phrase), []).append(row)
+
+        updates: List[Dict] = []
+        deletes: List[int] = []
+        unchanged = 0
+        kept_slugs = set()
+
+        for key, candidates in existing.items():
+            record = incoming.get(key)
+            if record is None:
+                if delete:
+                    deletes.extend(row.id for row in candidates)
+                else:
+                    kept_slugs.update(row.slug for row in candidates if row.slug)
+                continue
+
+            # Prefer the row spelled exactly like the record; extra spellings are duplicates
+            row = next((r for r in candidates if r.phrase == record['phrase']), candidates[0])
+            for other in candidates:
+                if other is not row:
+                    if delete:
+                        deletes.append(other.id)
+                    elif other.slug:
+                        kept_slugs.add(other.slug)
+
+            changes = {f: record[f] for f in FIELDS if getattr(row, f) != record[f]}
+            if changes or not row.slug:
+                updates.append({'id': row.id, 'slug': row.slug, **changes})
+            else:
+                unchanged += 1
+                kept_slugs.add(row.slug)
+
+        matched = {normalize_phrase(r.phrase) for r in rows}
+        inserts = [record for key, record in incoming.items() if key not in matched]
+
+        # Slugs: rows that keep theirs reserve them first, then updated rows, then new rows
+        phrases_by_id = {row.id: row.phrase for row in rows}
+        taken = set(kept_slugs)
+        reslug: List[Dict] = []
+        for update in updates:
+            if 'phrase' in update or not update['slug']:
+                reslug.append(update)
+            else:
+                taken.add(update['slug'])
+        moved: List[int] = []
+        for update in reslug:
+            phrase = update.get('phrase', phrases_by_id[update['id']])
+            slug = PhraseologicalEntry.make_slug(phrase, taken)
+            if slug != update['slug']:
+                moved.append(update['id'])
+            update['slug'] = slug
+            taken.add(slug)
+        for record in inserts:
+            record['slug'] = PhraseologicalEntry.make_slug(record['phrase'], taken)
+            taken.add(record['slug'])
+
+        return {
+            'read': read,
+            'duplicates': duplicates,
+            'inserts': inserts,
+            'updates': updates,
+            'deletes': deletes,
+            'moved': moved,
+            'unchanged': unchanged,
+        }
+
+    def load(
+        self,
+        records: Iterable[Dict],
+        delete: bool = True,
+        batch_size: int = 500,
+        dry_run: bool = False,
+    ) -> Dict:
+        """Apply ``records`` to the table in one transaction and report the changes.
+
+        Deletes, updates and inserts are sent as batched statements of
+        ``batch_size`` rows. With ``dry_run`` nothing is written.
+        """
+        started = time.perf_counter()
+        plan = self.diff(records, delete=delete)
+
+        if not dry_run and (plan['inserts'] or plan['updates'] or plan['deletes']):
+            try:
+                for chunk in _chunks(plan['deletes'], batch_size):
+                    db.session.execute(
+                        db.delete(PhraseologicalEntry)
+                        .where(PhraseologicalEntry.id.in_(chunk))
+                        .execution_options(synchronize_session=False)
+                    )
+
+                # Clear changing slugs first so swaps do not trip the unique index mid-batch
+                for chunk in _chunks(plan['moved'], batch_size):
+                    db.session.execute(
+                        db.update(PhraseologicalEntry)
+                        .where(PhraseologicalEntry.id.in_(chunk))
+                        .values(slug=None)
+                        .execution_options(synchronize_session=False)
+                    )
+                for chunk in _chunks(plan['updates'], batch_size):
+                    db.session.execute(db.update(PhraseologicalEntry), chunk)
+
+                for chunk in _chunks(plan['inserts'], batch_size):
+                    db.session.execute(db.insert(PhraseologicalEntry), chunk)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+        return {
+            'read': plan['read'],
+            'duplicates': plan['duplicates'],
+            'inserted': len(plan['inserts']),
+            'updated': len(plan['updates']),
+            'deleted': len(plan['deletes']),
+            'unchanged': plan['unchanged'],
+            'dry_run': dry_run,
+            'seconds': time.perf_counter() - started,
+        }
+
+    def load_file(self, path: str, **options) -> Dict:
+        """Load a JSON or NDJSON corpus file; see :meth:`load`."""
+        return self.load(iter_corpus(path), **options)
+
+
+corpus_loader = CorpusLoader()
@@ -0,0 +1,125 @@
+"""Character-trigram index for typo-tolerant phrase lookup."""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.services.stemmer import tokenize
+
+
+def normalize_phrase_text(text: str) -> str:
+    """Lowercase words separated by single spaces, ``ё`` folded to ``е``."""
+    return ' '.join(tokenize(text))
+
+
+def trigrams(text: str) -> List[str]:
+    """Distinct trigrams of ``text`` padded with spaces at both ends."""
+    padded = f' {text} '
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+def bounded_edit_distance(
+    query: str,
+    text: str,
+    max_distance: int,
+    substring: bool = False,
+) -> Optional[int]:
+    """Levenshtein distance if it is at most ``max_distance``, else ``None``.
+
+    With ``substring`` the query is aligned with the closest part of
+    ``text`` (skipping text at either end is free), so a partial query is
+    measured against the matching words of a longer phrase. Rows stop early
+    once every cell exceeds the bound.
+    """
+    if not substring and abs(len(query) - len(text)) > max_distance:
+        return None
+
+    previous = [0] * (len(text) + 1) if substring else list(range(len(text) + 1))
+    for i, query_char in enumerate(query, 1):
+        current = [i] + [0] * len(text)
+        row_min = i
+        for j, text_char in enumerate(text, 1):
+            cost = previous[j - 1] + (query_char != text_char)
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost
+            if cost < row_min:
+                row_min = cost
+        if row_min > max_distance:
+            return None
+        previous = current
+
+    distance = min(previous) if substring else previous[-1]
+    return distance if distance <= max_distance else None
+
+
+def default_max_distance(query: str) -> int:
+    """Allow roughly one typo per four characters, at least one."""
+    return max(1, len(query) // 4)
+
+
+class TrigramIndex:
+    """Posting lists of phrase trigrams with bounded edit-distance verification.
+
+    Candidates are the phrases sharing the most trigrams with the query; only
+    the best ``candidates`` of them are checked with the (quadratic) edit
+    distance, so a query never scans the whole corpus.
+    """
+
+    def __init__(self, documents: Sequence[Tuple[int, str]], candidates: int = 50) -> None:
+        self.doc_ids: List[int] = []
+        self.phrases: List[str] = []
+        self.postings: Dict[str, List[int]] = {}
+        self.candidates = candidates
+
+        for phrase_id, phrase in documents:
+            normalized = normalize_phrase_text(phrase)
+            if not normalized:
+                continue
+            doc = len(self.doc_ids)
+            self.doc_ids.append(phrase_id)
+            self.phrases.append(normalized)
+            for gram in trigrams(normalized):
+                self.postings.setdefault(gram, []).append(doc)
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        max_distance: Optional[int] = None,
+    ) -> List[Tuple[int, int]]:
+        """Return up to ``limit`` ``(phrase_id, distance)`` pairs, closest first."""
+        query = normalize_phrase_text(query)
+        if not query or limit <= 0:
+            return []
+        if max_distance is None:
+            max_distance = default_max_distance(query)
+
+        query_grams = trigrams(query)
+        overlap: Dict[int, int] = {}
+        for gram in query_grams:
+            for doc in self.postings.get(gram, ()):
+                overlap[doc] = overlap.get(doc, 0) + 1
+
+        # One edit changes at most three trigrams (the q-gram lemma)
+        min_overlap = max(1, len(query_grams) - 3 * max_distance)
+        candidates = sorted(
+            (doc for doc, shared in overlap.items() if shared >= min_overlap),
+            key=lambda doc: (-overlap[doc], len(self.phrases[doc])),
+        )[:self.candidates]
+
+        matches = []
+        for doc in candidates:
+            phrase = self.phrases[doc]
+            distance = bounded_edit_distance(
+                query, phrase, max_distance, substring=len(query) < len(phrase)
+            )
+            if distance is not None:
+                matches.append((distance, -overlap[doc], len(phrase), doc))
+
+        matches.sort()
+        return [(self.doc_ids[doc], distance) for distance, _, _, doc in matches[:limit]]
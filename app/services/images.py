@@ -0,0 +1,219 @@
+"""Phrase image manifest with responsive WebP variants and Open Graph crops."""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from flask import current_app
+
+from app.services.corpus import bump_corpus_version
+
+# Source formats in order of preference when a slug has several files.
+IMAGE_EXTENSIONS = ('webp', 'jpg', 'jpeg', 'png')
+# Site-wide images living next to phrase images; not phrase illustrations.
+RESERVED_PREFIXES = ('og-', 'category-')
+VARIANT_WIDTHS = (320, 640, 960)
+OG_SIZE = (1200, 630)
+WEBP_QUALITY = 80
+OG_JPEG_QUALITY = 85
+
+
+class ImageService:
+    """Service building and serving the phrase image manifest.
+
+    ``flask images-build`` scans ``static/images`` once, writes resized WebP
+    variants and an Open Graph crop for every ``<slug>.<ext>`` into
+    ``static/images/variants`` and records them in ``manifest.json``::
+
+        {"images": {"<slug>": {"src": ..., "width": ..., "height": ...,
+                               "variants": [{"path", "width", "height"}, ...],
+                               "og": {"path", "width", "height"}}}}
+
+    Workers load the manifest once and only re-stat it every
+    ``CORPUS_INDEX_CHECK_INTERVAL`` seconds, so page views never touch the
+    filesystem. Without a manifest, images are found by a single directory
+    scan (no variants or dimensions).
+    """
+
+    MANIFEST = 'manifest.json'
+    VARIANTS_DIR = 'variants'
+
+    def __init__(self) -> None:
+        self._images: Optional[Dict[str, Dict]] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_directory(self) -> str:
+        return os.path.join(current_app.static_folder, 'images')
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.get_directory(), self.MANIFEST)
+
+    def _manifest_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self._manifest_path()).st_mtime
+        except OSError:
+            return None
+
+    def _scan_sources(self) -> Dict[str, str]:
+        """Map each slug to its preferred source file name."""
+        sources: Dict[str, str] = {}
+        try:
+            entries = list(os.scandir(self.get_directory()))
+        except OSError:
+            return sources
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            slug, _, ext = entry.name.rpartition('.')
+            ext = ext.lower()
+            if not slug or ext not in IMAGE_EXTENSIONS or slug.startswith(RESERVED_PREFIXES):
+                continue
+            current = sources.get(slug)
+            if current is None or IMAGE_EXTENSIONS.index(ext) < IMAGE_EXTENSIONS.index(
+                current.rpartition('.')[2].lower()
+            ):
+                sources[slug] = entry.name
+        return sources
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self._manifest_path(), 'r', encoding='utf-8') as f:
+                return json.load(f).get('images', {})
+        except (OSError, ValueError):
+            return {
+                slug: {'src': f'images/{name}', 'variants': []}
+                for slug, name in self._scan_sources().items()
+            }
+
+    def get_images(self) -> Dict[str, Dict]:
+        """Return the manifest entries of this worker, reloading a rebuilt manifest."""
+        now = time.monotonic()
+        interval = current_app.config.get('CORPUS_INDEX_CHECK_INTERVAL', 5)
+        if self._images is not None and now - self._checked_at < interval:
+            return self._images
+
+        with self._lock:
+            if self._images is None or now - self._checked_at >= interval:
+                mtime = self._manifest_mtime()
+                if self._images is None or mtime != self._mtime:
+                    self._images = self._load()
+                    self._mtime = mtime
+                self._checked_at = time.monotonic()
+            return self._images
+
+    def get_image(self, slug: str) -> Optional[Dict]:
+        """Manifest entry for a phrase slug, or ``None`` if it has no image."""
+        return self.get_images().get(slug)
+
+    # Building
+
+    def build(self, force: bool = False) -> Dict:
+        """Create missing or outdated variants and rewrite the manifest.
+
+        Sources whose size and modification time match the previous manifest
+        are skipped unless ``force`` is set. Requires Pillow.
+        """
+        try:
+            from PIL import Image, ImageOps
+        except ImportError as exc:  # pragma: no cover - depends on the environment
+            raise RuntimeError('Building image variants requires Pillow (pip install Pillow)') from exc
+
+        directory = self.get_directory()
+        variants_dir = os.path.join(directory, self.VARIANTS_DIR)
+        os.makedirs(variants_dir, exist_ok=True)
+
+        try:
+            with open(self._manifest_path(), 'r', encoding='utf-8') as f:
+                previous = json.load(f).get('images', {})
+        except (OSError, ValueError):
+            previous = {}
+
+        images: Dict[str, Dict] = {}
+        built = skipped = 0
+        for slug, name in sorted(self._scan_sources().items()):
+            source_path = os.path.join(directory, name)
+            stat = os.stat(source_path)
+            source = {'src': f'images/{name}', 'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+            old = previous.get(slug)
+            if (not force and old and all(old.get(k) == v for k, v in source.items())
+                    and self._outputs_exist(old)):
+                images[slug] = old
+                skipped += 1
+                continue
+
+            with Image.open(source_path) as opened:
+                image = ImageOps.exif_transpose(opened)
+                if image.mode not in ('RGB', 'RGBA'):
+                    image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+                width, height = image.size
+
+                # Never upscale: widths above the source collapse into one full-size variant
+                widths = {w for w in VARIANT_WIDTHS if w < width} | {min(width, max(VARIANT_WIDTHS))}
+                variants: List[Dict] = []
+                for target in sorted(widths):
+                    size = (target, max(1, round(height * target / width)))
+                    path = f'images/{self.VARIANTS_DIR}/{slug}-{target}w.webp'
+                    resized = image if size == image.size else image.resize(size, Image.LANCZOS)
+                    resized.save(os.path.join(current_app.static_folder, path), 'WEBP',
+                                 quality=WEBP_QUALITY, method=6)
+                    variants.append({'path': path, 'width': size[0], 'height': size[1]})
+
+                og_size = OG_SIZE if width >= OG_SIZE[0] else (
+                    width, round(width * OG_SIZE[1] / OG_SIZE[0])
+                )
+                og_path = f'images/{self.VARIANTS_DIR}/{slug}-og.jpg'
+                ImageOps.fit(image.convert('RGB'), og_size, Image.LANCZOS).save(
+                    os.path.join(current_app.static_folder, og_path), 'JPEG',
+                    quality=OG_JPEG_QUALITY, optimize=True, progressive=True,
+                )
+
+            images[slug] = {
+                **source,
+                'width': width,
+                'height': height,
+                'variants': variants,
+                'og': {'path': og_path, 'width': og_size[0], 'height': og_size[1]},
+            }
+            built += 1
+
+        self._remove_stale(variants_dir, images)
+
+        tmp_path = f'{self._manifest_path()}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'images': images}, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path())
+
+        with self._lock:
+            self._images = None
+        if images != previous:
+            # Cached phrase pages embed image markup
+            bump_corpus_version()
+        return {'images': len(images), 'built': built, 'skipped': skipped}
+
+    def _outputs_exist(self, entry: Dict) -> bool:
+        paths = [v['path'] for v in entry.get('variants', [])]
+        if entry.get('og'):
+            paths.append(entry['og']['path'])
+        return bool(paths) and all(
+            os.path.exists(os.path.join(current_app.static_folder, path)) for path in paths
+        )
+
+    def _remove_stale(self, variants_dir: str, images: Dict[str, Dict]) -> None:
+        """Delete variants no manifest entry refers to (removed or resized sources)."""
+        keep = {
+            os.path.basename(path)
+            for entry in images.values()
+            for path in [v['path'] for v in entry['variants']] + [entry['og']['path']]
+        }
+        for name in os.listdir(variants_dir):
+            if name not in keep and name.endswith(('.webp', '.jpg')):
+                os.remove(os.path.join(variants_dir, name))
+
+
+image_service = ImageService()
@@ -0,0 +1,322 @@
+"""Per-request timings (Server-Timing) and Prometheus metrics per endpoint."""
+from __future__ import annotations
+
+import hmac
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from flask import (
+    Flask, before_render_template, current_app, g, has_request_context, request, template_rendered,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.extensions import cache
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+METRIC_PREFIX = 'frazeologizm'
+# A request carrying any of these came through a proxy, whatever its address
+FORWARDING_HEADERS = ('X-Forwarded-For', 'X-Real-IP', 'Forwarded')
+
+
+# Flask-Caching memoize keys are a base64 digest (plus its version suffix)
+_MEMOIZE_KEY = re.compile(r'[A-Za-z0-9+/]{16}[A-Za-z0-9+/=]*')
+
+
+def key_prefix(key: str) -> str:
+    """Group cache keys into a bounded set of labels.
+
+    ``page/...`` -> ``page``, single-flight ``memo/a.b.Class.method@v1/...`` ->
+    ``memo:Class.method``; the opaque keys of ``cache.memoize`` -> ``memoize``.
+    """
+    if key.endswith('_memver'):
+        return 'memoize_version'
+    if _MEMOIZE_KEY.fullmatch(key):
+        return 'memoize'
+    if key.startswith('memo/'):
+        return 'memo:' + key_prefix(key[5:])
+    head = re.split(r'[/@]', key, maxsplit=1)[0]
+    if '.' in head:
+        head = '.'.join(head.split('.')[-2:])
+    return head[:60]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class RequestStats:
+    """What one request spent its time on."""
+
+    __slots__ = ('started', 'sql_count', 'sql_seconds', 'template_seconds', 'template_started',
+                 'cache_seconds', 'cache')
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_started: Optional[float] = None
+        self.cache_seconds = 0.0
+        # prefix -> [hits, misses]
+        self.cache: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+
+
+def _current() -> Optional[RequestStats]:
+    return g.get('_request_stats') if has_request_context() else None
+
+
+class InstrumentedCache:
+    """Proxy around the Flask-Caching backend counting hits and misses per key prefix."""
+
+    def __init__(self, backend: Any, metrics: 'Metrics') -> None:
+        self.backend = backend
+        self._metrics = metrics
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.backend, name)
+
+    def _record(self, keys: Sequence[str], values: Sequence[Any], started: float) -> None:
+        elapsed = time.perf_counter() - started
+        stats = _current()
+        if stats is not None:
+            stats.cache_seconds += elapsed
+        for key, value in zip(keys, values):
+            prefix = key_prefix(key)
+            hit = value is not None
+            self._metrics.count_cache(prefix, hit)
+            if stats is not None:
+                stats.cache[prefix][0 if hit else 1] += 1
+
+    def get(self, key: str) -> Any:
+        started = time.perf_counter()
+        value = self.backend.get(key)
+        self._record((key,), (value,), started)
+        return value
+
+    def get_many(self, *keys: str) -> List[Any]:
+        started = time.perf_counter()
+        values = self.backend.get_many(*keys)
+        self._record(keys, values, started)
+        return values
+
+    def get_dict(self, *keys: str) -> Dict[str, Any]:
+        return dict(zip(keys, self.get_many(*keys)))
+
+
+class Metrics:
+    """Collects request, SQL, cache and template timings in this worker.
+
+    Each response gets a ``Server-Timing`` header; ``/api/metrics`` renders
+    the aggregates in the Prometheus text format. Counters are kept per
+    worker process and labelled with its PID, so sum them across workers.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._durations: Dict[str, Histogram] = {}
+        self._sizes: Dict[str, Histogram] = {}
+        self._requests: Dict[Tuple[str, int], int] = defaultdict(int)
+        self._sql: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+        self._templates: Dict[str, float] = defaultdict(float)
+        self._cache: Dict[Tuple[str, bool], int] = defaultdict(int)
+        self._engine_hooked = False
+
+    def init_app(self, app: Flask) -> None:
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+
+        # Registered before Flask-Compress, so it runs after it and sees the sent size
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+
+        extension = app.extensions.get('cache', {})
+        if cache in extension and not isinstance(extension[cache], InstrumentedCache):
+            extension[cache] = InstrumentedCache(extension[cache], self)
+
+        if not self._engine_hooked:
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._engine_hooked = True
+
+    # Hooks
+
+    @staticmethod
+    def _before_request() -> None:
+        g._request_stats = RequestStats()
+
+    # The start time lives on the statement's execution context, so a failed
+    # statement (no after_cursor_execute) leaves nothing behind
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is not None and has_request_context() and '_request_stats' in g:
+            context._metrics_started = time.perf_counter()
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        started = getattr(context, '_metrics_started', None)
+        stats = _current()
+        if started is None or stats is None:
+            return
+        stats.sql_count += 1
+        stats.sql_seconds += time.perf_counter() - started
+
+    @staticmethod
+    def _before_render(sender, template, context, **extra) -> None:
+        stats = _current()
+        if stats is not None:
+            stats.template_started = time.perf_counter()
+
+    @staticmethod
+    def _after_render(sender, template, context, **extra) -> None:
+        stats = _current()
+        if stats is not None and stats.template_started is not None:
+            stats.template_seconds += time.perf_counter() - stats.template_started
+            stats.template_started = None
+
+    def _after_request(self, response):
+        stats = _current()
+        if stats is None:
+            return response
+        total = time.perf_counter() - stats.started
+        endpoint = request.url_rule.endpoint if request.url_rule else 'unmatched'
+        size = response.content_length
+        if size is None and not (response.direct_passthrough or response.is_streamed):
+            size = len(response.get_data())
+
+        hits = sum(counts[0] for counts in stats.cache.values())
+        misses = sum(counts[1] for counts in stats.cache.values())
+        timings = [
+            f'sql;dur={stats.sql_seconds * 1000:.1f};desc="{stats.sql_count} queries"',
+            f'cache;dur={stats.cache_seconds * 1000:.1f};desc="{hits} hits, {misses} misses"',
+        ]
+        if stats.template_seconds:
+            timings.append(f'tpl;dur={stats.template_seconds * 1000:.1f}')
+        timings.append(f'total;dur={total * 1000:.1f}')
+        response.headers['Server-Timing'] = ', '.join(timings)
+
+        with self._lock:
+            self._requests[(endpoint, response.status_code)] += 1
+            self._durations.setdefault(endpoint, Histogram(DURATION_BUCKETS)).observe(total)
+            if size is not None:
+                self._sizes.setdefault(endpoint, Histogram(SIZE_BUCKETS)).observe(size)
+            sql = self._sql[endpoint]
+            sql[0] += stats.sql_count
+            sql[1] += stats.sql_seconds
+            self._templates[endpoint] += stats.template_seconds
+        return response
+
+    @staticmethod
+    def authorized() -> bool:
+        """Whether the current request may read worker internals.
+
+        With ``METRICS_TOKEN`` set the request needs ``Authorization: Bearer
+        <token>``; otherwise only direct, unproxied requests from
+        ``METRICS_ALLOWED_IPS`` are allowed.
+        """
+        token = current_app.config.get('METRICS_TOKEN')
+        if token:
+            return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+        if any(header in request.headers for header in FORWARDING_HEADERS):
+            return False
+        return request.remote_addr in current_app.config.get('METRICS_ALLOWED_IPS', ())
+
+    def count_cache(self, prefix: str, hit: bool) -> None:
+        with self._lock:
+            self._cache[(prefix, hit)] += 1
+
+    # Exposition
+
+    def render(self) -> str:
+        """All metrics of this worker in the Prometheus text format."""
+        worker = f'worker="{os.getpid()}"'
+        p = METRIC_PREFIX
+        lines: List[str] = []
+        with self._lock:
+            lines += [f'# HELP {p}_requests_total Requests by endpoint and status.',
+                      f'# TYPE {p}_requests_total counter']
+            for (endpoint, status), count in sorted(self._requests.items()):
+                lines.append(f'{p}_requests_total{{{worker},endpoint="{endpoint}",status="{status}"}} {count}')
+
+            lines += [f'# HELP {p}_request_duration_seconds Time spent in the application per request.',
+                      f'# TYPE {p}_request_duration_seconds histogram']
+            for endpoint, histogram in sorted(self._durations.items()):
+                lines += histogram.lines(f'{p}_request_duration_seconds', f'{worker},endpoint="{endpoint}"')
+
+            lines += [f'# HELP {p}_response_size_bytes Response body size (after compression).',
+                      f'# TYPE {p}_response_size_bytes histogram']
+            for endpoint, histogram in sorted(self._sizes.items()):
+                lines += histogram.lines(f'{p}_response_size_bytes', f'{worker},endpoint="{endpoint}"')
+
+            lines += [f'# HELP {p}_sql_queries_total SQL statements executed.',
+                      f'# TYPE {p}_sql_queries_total counter']
+            lines += [f'{p}_sql_queries_total{{{worker},endpoint="{endpoint}"}} {count}'
+                      for endpoint, (count, _) in sorted(self._sql.items())]
+            lines += [f'# HELP {p}_sql_seconds_total Time spent in SQL statements.',
+                      f'# TYPE {p}_sql_seconds_total counter']
+            lines += [f'{p}_sql_seconds_total{{{worker},endpoint="{endpoint}"}} {seconds:.6f}'
+                      for endpoint, (_, seconds) in sorted(self._sql.items())]
+
+            lines += [f'# HELP {p}_template_seconds_total Time spent rendering templates.',
+                      f'# TYPE {p}_template_seconds_total counter']
+            lines += [f'{p}_template_seconds_total{{{worker},endpoint="{endpoint}"}} {seconds:.6f}'
+                      for endpoint, seconds in sorted(self._templates.items())]
+
+            lines += [f'# HELP {p}_cache_requests_total Cache lookups by key prefix and result.',
+                      f'# TYPE {p}_cache_requests_total counter']
+            for (prefix, hit), count in sorted(self._cache.items()):
+                result = 'hit' if hit else 'miss'
+                lines.append(f'{p}_cache_requests_total{{{worker},prefix="{prefix}",result="{result}"}} {count}')
+
+        backend_stats = getattr(cache.cache, 'stats', None)
+        if backend_stats is not None:
+            tiers = backend_stats(largest=0)
+            lines += [f'# HELP {p}_cache_tier_events_total Layered cache events per tier.',
+                      f'# TYPE {p}_cache_tier_events_total counter']
+            for tier, values in tiers.items():
+                for name in ('hits', 'misses', 'evictions', 'expirations', 'flushes'):
+                    if name in values:
+                        lines.append(f'{p}_cache_tier_events_total{{{worker},tier="{tier}",event="{name}"}} {values[name]}')
+            lines += [f'# TYPE {p}_cache_local_bytes gauge',
+                      f'{p}_cache_local_bytes{{{worker}}} {tiers["local"]["bytes"]}',
+                      f'# TYPE {p}_cache_local_items gauge',
+                      f'{p}_cache_local_items{{{worker}}} {tiers["local"]["items"]}']
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
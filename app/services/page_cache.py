@@ -0,0 +1,130 @@
+"""Full-page cache storing rendered HTML with precompressed encodings."""
+from __future__ import annotations
+
+import functools
+import gzip
+import hashlib
+import os
+from typing import Callable, Dict, Optional
+
+from flask import current_app, make_response, request
+
+from app.extensions import cache
+from app.services.corpus import VERSIONED_CACHE_TIMEOUT, get_corpus_version
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+GZIP_LEVEL = 9
+# Pages are compressed on the request that misses (after every corpus
+# version bump); quality 11 costs ~30x quality 5 for a few percent
+BROTLI_QUALITY = 5
+
+
+class PageCache:
+    """Caches whole HTML responses of anonymous GET requests.
+
+    Entries are keyed by endpoint, view arguments, corpus version and a
+    signature of the template files, so edits to the data or a deploy with
+    new templates never serve an old page. Each entry keeps the HTML plus
+    its gzip (and brotli) encodings, compressed once per entry; hits skip
+    rendering and Flask-Compress and send the encoding the client accepts.
+    """
+
+    def __init__(self) -> None:
+        self._template_signature: Optional[str] = None
+
+    def enabled(self) -> bool:
+        return current_app.config.get('PAGE_CACHE_ENABLED', False)
+
+    def _is_cacheable_request(self) -> bool:
+        """Only anonymous GET/HEAD requests share cached pages."""
+        return (
+            request.method in ('GET', 'HEAD')
+            and 'Authorization' not in request.headers
+            and current_app.config.get('SESSION_COOKIE_NAME', 'session') not in request.cookies
+        )
+
+    def get_template_signature(self) -> str:
+        """Hash of template names, sizes and mtimes, computed once per worker."""
+        if self._template_signature is None:
+            digest = hashlib.sha1()
+            for folder in filter(None, [current_app.template_folder]):
+                root = os.path.join(current_app.root_path, folder)
+                for dirpath, _, filenames in sorted(os.walk(root)):
+                    for name in sorted(filenames):
+                        path = os.path.join(dirpath, name)
+                        stat = os.stat(path)
+                        digest.update(f'{path}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+            self._template_signature = digest.hexdigest()[:12]
+        return self._template_signature
+
+    def make_key(self, endpoint: str, view_args: Dict) -> str:
+        args = ','.join(f'{k}={v}' for k, v in sorted(view_args.items()))
+        return f'page/{endpoint}/{args}@{self.get_template_signature()}@v{get_corpus_version()}'
+
+    @staticmethod
+    def _encode(body: bytes, mimetype: str) -> Dict:
+        entry = {
+            'mimetype': mimetype,
+            'etag': hashlib.sha1(body).hexdigest()[:20],
+            'identity': body,
+            'gzip': gzip.compress(body, compresslevel=GZIP_LEVEL),
+        }
+        if brotli is not None:
+            entry['br'] = brotli.compress(body, quality=BROTLI_QUALITY)
+        return entry
+
+    @staticmethod
+    def _respond(entry: Dict, hit: bool):
+        offers = [encoding for encoding in ('br', 'gzip') if encoding in entry]
+        encoding = request.accept_encodings.best_match(offers) or 'identity'
+
+        response = make_response(entry[encoding])
+        response.mimetype = entry['mimetype']
+        if encoding != 'identity':
+            # Already compressed, so Flask-Compress leaves the body alone
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(f"{entry['etag']}-{encoding}")
+        response.headers['X-Page-Cache'] = 'HIT' if hit else 'MISS'
+        return response.make_conditional(request)
+
+    def cached(self, timeout: int = VERSIONED_CACHE_TIMEOUT) -> Callable:
+        """Decorator caching an HTML view for anonymous visitors."""
+
+        def decorator(view):
+            @functools.wraps(view)
+            def decorated(*args, **kwargs):
+                if not (self.enabled() and self._is_cacheable_request()):
+                    return view(*args, **kwargs)
+
+                key = self.make_key(request.endpoint, request.view_args or {})
+                try:
+                    entry = cache.get(key)
+                except Exception:
+                    current_app.logger.exception('Page cache lookup failed')
+                    return view(*args, **kwargs)
+                if entry is not None:
+                    return self._respond(entry, hit=True)
+
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.mimetype != 'text/html' \
+                        or response.direct_passthrough:
+                    return response
+
+                entry = self._encode(response.get_data(), response.mimetype)
+                try:
+                    cache.set(key, entry, timeout=timeout)
+                except Exception:
+                    current_app.logger.exception('Page cache store failed')
+                return self._respond(entry, hit=False)
+
+            return decorated
+
+        return decorator
+
+
+page_cache = PageCache()
@@ -0,0 +1,28 @@
+"""Opaque cursors for keyset pagination."""
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, Dict
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor that cannot be decoded."""
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Encode a position (e.g. ``{'after': 42}``) as a URL-safe token."""
+    raw = json.dumps(position, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a token produced by ``encode_cursor``."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError) as exc:
+        raise InvalidCursor('Malformed cursor') from exc
+    if not isinstance(position, dict):
+        raise InvalidCursor('Malformed cursor')
+    return position
@@ -0,0 +1,169 @@
+"""Pre-serialized JSON fragments for phrase API responses."""
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import current_app
+
+from app.extensions import cache, db
+from app.models import PhraseologicalEntry
+from app.services.corpus import VERSIONED_CACHE_TIMEOUT, get_corpus_version
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize ``obj`` to compact UTF-8 JSON, with orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(body: bytes):
+    """``application/json`` response with an already serialized body."""
+    return current_app.response_class(body, mimetype='application/json')
+
+
+class PhrasePayloadService:
+    """Service caching each phrase's JSON as bytes and assembling list responses.
+
+    Fragments are keyed by phrase ID and corpus version, so a list response
+    is one ``get_many`` plus a byte join: rows, ``to_dict()`` and encoding are
+    only needed for phrases missing from the cache.
+    """
+
+    def _key(self, phrase_id: int, version: int) -> str:
+        return f'phrase_json/{phrase_id}@v{version}'
+
+    def _slug_key(self, slug: str, version: int) -> str:
+        return f'phrase_json/slug/{slug}@v{version}'
+
+    def _store(self, fragments: Dict[str, bytes]) -> None:
+        try:
+            cache.set_many(fragments, timeout=VERSIONED_CACHE_TIMEOUT)
+        except Exception:
+            current_app.logger.exception('Storing phrase fragments failed')
+
+    def _lookup(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        try:
+            return list(cache.get_many(*keys))
+        except Exception:
+            current_app.logger.exception('Phrase fragment lookup failed')
+            return [None] * len(keys)
+
+    def get_fragments(self, ids: Sequence[int]) -> List[bytes]:
+        """JSON of the phrases in ``ids`` in that order, skipping missing IDs."""
+        version = get_corpus_version()
+        keys = [self._key(phrase_id, version) for phrase_id in ids]
+        fragments = dict(zip(ids, self._lookup(keys)))
+
+        missing = [phrase_id for phrase_id, fragment in fragments.items() if fragment is None]
+        if missing:
+            new = {}
+            for phrase in PhraseologicalEntry.get_by_ids(missing):
+                fragments[phrase.id] = new[self._key(phrase.id, version)] = dumps(phrase.to_dict())
+            self._store(new)
+        return [fragments[phrase_id] for phrase_id in ids if fragments.get(phrase_id) is not None]
+
+    def get_batch(
+        self, ids: Sequence[int], slugs: Sequence[str]
+    ) -> Tuple[Dict[int, bytes], Dict[str, bytes]]:
+        """JSON of phrases by ID and by slug, as ``({id: json}, {slug: json})``.
+
+        All entries are read with one ``get_many`` (fragments are also kept
+        under their slug); the misses are loaded with a single ``IN`` query.
+        IDs and slugs that do not exist are left out.
+        """
+        version = get_corpus_version()
+        id_keys = {self._key(phrase_id, version): phrase_id for phrase_id in ids}
+        slug_keys = {self._slug_key(slug, version): slug for slug in slugs}
+        keys = list(id_keys) + list(slug_keys)
+        found = dict(zip(keys, self._lookup(keys)))
+
+        by_id = {phrase_id: found[key] for key, phrase_id in id_keys.items() if found[key] is not None}
+        by_slug = {slug: found[key] for key, slug in slug_keys.items() if found[key] is not None}
+        missing_ids = {phrase_id for phrase_id in ids if phrase_id not in by_id}
+        missing_slugs = {slug for slug in slugs if slug not in by_slug}
+        if not (missing_ids or missing_slugs):
+            return by_id, by_slug
+
+        conditions = []
+        if missing_ids:
+            conditions.append(PhraseologicalEntry.id.in_(missing_ids))
+        if missing_slugs:
+            conditions.append(PhraseologicalEntry.slug.in_(missing_slugs))
+        new = {}
+        for phrase in PhraseologicalEntry.query.filter(db.or_(*conditions)):
+            fragment = new[self._key(phrase.id, version)] = dumps(phrase.to_dict())
+            if phrase.id in missing_ids:
+                by_id[phrase.id] = fragment
+            if phrase.slug in missing_slugs:
+                by_slug[phrase.slug] = new[self._slug_key(phrase.slug, version)] = fragment
+        self._store(new)
+        return by_id, by_slug
+
+    def fragments_for(self, phrases: Sequence[PhraseologicalEntry]) -> List[bytes]:
+        """JSON of already loaded phrases, serializing only those not cached yet."""
+        version = get_corpus_version()
+        keys = [self._key(phrase.id, version) for phrase in phrases]
+        fragments = self._lookup(keys)
+
+        new = {}
+        for index, (phrase, key) in enumerate(zip(phrases, keys)):
+            if fragments[index] is None:
+                fragments[index] = new[key] = dumps(phrase.to_dict())
+        if new:
+            self._store(new)
+        return fragments
+
+    @staticmethod
+    def parse_fields(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """Fields named in a ``fields=`` parameter, in order; ``None`` for all fields.
+
+        Raises ``ValueError`` for a name that is not an API field.
+        """
+        names = [name.strip() for name in (value or '').split(',') if name.strip()]
+        if not names:
+            return None
+        for name in names:
+            if name not in PhraseologicalEntry.API_FIELDS:
+                raise ValueError(f'Unknown field: {name}')
+        return tuple(dict.fromkeys(names))
+
+    @staticmethod
+    def project(rows: Sequence[Sequence[Any]], fields: Sequence[str], columnar: bool = False) -> Any:
+        """Objects (or with ``columnar`` one array per field) of ``fields``.
+
+        ``rows`` are ``(id, *other fields)`` as read by ``get_columns_by_ids``.
+        """
+        others = [field for field in fields if field != 'id']
+        values = {'id': [row[0] for row in rows]}
+        for index, field in enumerate(others, 1):
+            values[field] = [row[index] for row in rows]
+        if 'meanings' in values:
+            values['meanings'] = [meanings or [] for meanings in values['meanings']]
+
+        values = {field: values[field] for field in fields}
+        if columnar:
+            return values
+        return [dict(zip(values, row)) for row in zip(*values.values())]
+
+    def render(self, fragments: Iterable[bytes], list_key: str = 'phrases', **fields: Any) -> bytes:
+        """A JSON object with ``list_key`` holding ``fragments`` and the other ``fields``."""
+        body = b'{"' + list_key.encode('utf-8') + b'":[' + b','.join(fragments) + b']'
+        if fields:
+            body += b',' + dumps(fields)[1:-1]
+        return body + b'}'
+
+    def response(self, fragments: Iterable[bytes], list_key: str = 'phrases', **fields: Any):
+        """``application/json`` response from :meth:`render`."""
+        return json_response(self.render(fragments, list_key, **fields))
+
+
+payload_service = PhrasePayloadService()
@@ -0,0 +1,52 @@
+"""In-memory phrase ID arrays per category for cheap counting and sampling."""
+from __future__ import annotations
+
+import random
+from typing import Dict, List, Optional
+
+from app.extensions import db
+from app.models import PhraseologicalEntry
+from app.services.corpus import CorpusIndex
+
+
+class PhraseIdService:
+    """Service keeping sorted phrase IDs per category in each worker.
+
+    The ``None`` key holds every phrase ID.
+    """
+
+    def __init__(self) -> None:
+        self._ids = CorpusIndex(self._build_ids, name='category id arrays')
+
+    def _build_ids(self) -> Dict[Optional[str], List[int]]:
+        ids: Dict[Optional[str], List[int]] = {None: []}
+        rows = db.session.query(
+            PhraseologicalEntry.id, PhraseologicalEntry.category
+        ).order_by(PhraseologicalEntry.id)
+        for phrase_id, category in rows:
+            ids[None].append(phrase_id)
+            if category:
+                ids.setdefault(category, []).append(phrase_id)
+        return ids
+
+    def get_ids(self, category: Optional[str] = None) -> List[int]:
+        """Sorted IDs of a category, or of all phrases when ``category`` is empty."""
+        return self._ids.get().get(category or None, [])
+
+    def count(self, category: Optional[str] = None) -> int:
+        """Number of phrases in a category without a COUNT(*) query."""
+        return len(self.get_ids(category))
+
+    def sample(
+        self,
+        category: Optional[str] = None,
+        limit: int = 20,
+        seed: Optional[int] = None,
+    ) -> List[int]:
+        """Pick up to ``limit`` random IDs; the same ``seed`` gives the same IDs."""
+        pool = self.get_ids(category)
+        rng = random.Random(seed) if seed is not None else random
+        return rng.sample(pool, min(max(limit, 0), len(pool)))
+
+
+phrase_id_service = PhraseIdService()
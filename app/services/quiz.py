@@ -0,0 +1,173 @@
+"""Quiz service building trainer questions server-side from per-category pools."""
+from __future__ import annotations
+
+import random
+from typing import Dict, List, Optional
+
+from app.extensions import db
+from app.models import PhraseologicalEntry
+from app.services.corpus import CorpusIndex
+
+GENERAL_CATEGORY = 'general'
+PLACEHOLDER_MEANING = 'Значение требует уточнения'
+MIN_MEANING_LENGTH = 10
+
+# Used only when a pool is too small to provide enough real distractors.
+GENERIC_MEANINGS = (
+    'выражение радости или удовлетворения',
+    'обозначение быстрого движения или действия',
+    'описание сложной или запутанной ситуации',
+    'характеристика ненадежного человека',
+    'обозначение большого количества чего-либо',
+    'выражение недовольства или возмущения',
+    'описание красивого внешнего вида',
+    'характеристика умного человека',
+    'обозначение трудной работы',
+    'выражение согласия или одобрения',
+)
+
+
+def usable_meanings(meanings: Optional[List[str]]) -> List[str]:
+    """Meanings good enough to be shown as quiz answers."""
+    return [
+        m.strip() for m in (meanings or [])
+        if isinstance(m, str) and len(m.strip()) > MIN_MEANING_LENGTH and m.strip() != PLACEHOLDER_MEANING
+    ]
+
+
+class QuizPools:
+    """Quiz-ready phrases grouped by category.
+
+    ``pools[category]`` lists indices into ``items``; the general category
+    holds every usable phrase.
+    """
+
+    def __init__(self, items: List[Dict]) -> None:
+        self.items = items
+        self.pools: Dict[str, List[int]] = {GENERAL_CATEGORY: list(range(len(items)))}
+        for index, item in enumerate(items):
+            if item['category'] and item['category'] != GENERAL_CATEGORY:
+                self.pools.setdefault(item['category'], []).append(index)
+
+    def pool(self, category: Optional[str]) -> List[int]:
+        return self.pools.get(category or GENERAL_CATEGORY, [])
+
+
+class QuizService:
+    """Service producing ready-made quiz questions in small batches."""
+
+    def __init__(self) -> None:
+        self._pools = CorpusIndex(self._build_pools, name='quiz pools')
+
+    def _build_pools(self) -> QuizPools:
+        rows = db.session.query(
+            PhraseologicalEntry.id,
+            PhraseologicalEntry.phrase,
+            PhraseologicalEntry.slug,
+            PhraseologicalEntry.category,
+            PhraseologicalEntry.meanings,
+            PhraseologicalEntry.etymology,
+        ).order_by(PhraseologicalEntry.id)
+
+        items = []
+        for phrase_id, phrase, slug, category, meanings, etymology in rows:
+            meanings = usable_meanings(meanings)
+            if not meanings:
+                continue
+            items.append({
+                'id': phrase_id,
+                'phrase': phrase,
+                'slug': slug,
+                'category': category,
+                'meanings': meanings,
+                'etymology': etymology,
+            })
+        return QuizPools(items)
+
+    def get_pool_size(self, category: Optional[str]) -> int:
+        """Number of questions available for a category."""
+        return len(self._pools.get().pool(category))
+
+    def get_questions(
+        self,
+        category: Optional[str],
+        seed: int,
+        offset: int = 0,
+        count: int = 10,
+        options: int = 3,
+    ) -> Dict:
+        """Return questions ``offset .. offset + count`` of the seeded question order.
+
+        The same (category, seed) always yields the same order, so a client
+        walks through every phrase of the category exactly once by fetching
+        consecutive batches, and each batch is safely cacheable.
+        """
+        pools = self._pools.get()
+        pool = pools.pool(category)
+
+        order = list(pool)
+        random.Random(seed).shuffle(order)
+        batch = order[offset:offset + count]
+
+        all_items = pools.pool(GENERAL_CATEGORY)
+        questions = []
+        for index in batch:
+            item = pools.items[index]
+            rng = random.Random(f'{seed}:{item["id"]}')
+            correct = rng.choice(item['meanings'])
+
+            # Distractors from the same category when it is big enough, like the trainer did
+            distractor_pool = pool if len(pool) > options else all_items
+            distractors = self._pick_distractors(
+                rng, pools, distractor_pool, index, correct, options - 1
+            )
+
+            answers = [correct] + distractors
+            rng.shuffle(answers)
+            questions.append({
+                'id': item['id'],
+                'phrase': item['phrase'],
+                'slug': item['slug'],
+                'category': item['category'],
+                'etymology': item['etymology'],
+                'options': answers,
+                'answer': answers.index(correct),
+            })
+
+        next_offset = offset + len(batch)
+        return {
+            'category': category or GENERAL_CATEGORY,
+            'seed': seed,
+            'questions': questions,
+            'total': len(pool),
+            'offset': offset,
+            'next_offset': next_offset if next_offset < len(pool) else None,
+        }
+
+    @staticmethod
+    def _pick_distractors(
+        rng: random.Random,
+        pools: QuizPools,
+        pool: List[int],
+        current: int,
+        correct: str,
+        count: int,
+    ) -> List[str]:
+        distractors: List[str] = []
+        # Sample a few extra candidates to survive duplicates without scanning the pool.
+        candidates = rng.sample(pool, min(len(pool), count * 3 + 1))
+        for index in candidates:
+            if index == current:
+                continue
+            meaning = rng.choice(pools.items[index]['meanings'])
+            if meaning != correct and meaning not in distractors:
+                distractors.append(meaning)
+                if len(distractors) == count:
+                    return distractors
+
+        generic = [m for m in GENERIC_MEANINGS if m != correct and m not in distractors]
+        distractors.extend(rng.sample(generic, count - len(distractors)))
+        return distractors
+
+
+quiz_service = QuizService()
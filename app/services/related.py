@@ -0,0 +1,151 @@
+"""Related phrases from a precomputed TF-IDF nearest-neighbour table."""
+from __future__ import annotations
+
+import math
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from app.extensions import db
+from app.models import PhraseNeighbor, PhraseologicalEntry
+from app.services.corpus import bump_corpus_version
+from app.services.stemmer import analyze
+
+# Phrase words say most about the topic, etymology the least.
+FIELD_WEIGHTS = (2.0, 1.0, 0.5)
+MIN_TOKEN_LENGTH = 3
+# Terms in more than this share of documents add cost but no signal.
+MAX_DOCUMENT_FREQUENCY = 0.2
+
+SparseVector = Dict[str, float]
+
+
+def tfidf_vectors(documents: Sequence[Tuple[str, str, str]]) -> List[SparseVector]:
+    """L2-normalized sparse TF-IDF vectors of (phrase, meanings, etymology) texts.
+
+    Tokens are stemmed; term frequencies are sublinear and weighted by field.
+    """
+    counts: List[Dict[str, float]] = []
+    document_frequency: Dict[str, int] = {}
+    for fields in documents:
+        tf: Dict[str, float] = {}
+        for weight, text in zip(FIELD_WEIGHTS, fields):
+            for term in analyze(text):
+                if len(term) >= MIN_TOKEN_LENGTH:
+                    tf[term] = tf.get(term, 0.0) + weight
+        counts.append(tf)
+        for term in tf:
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+
+    total = len(documents)
+    max_df = max(2, int(total * MAX_DOCUMENT_FREQUENCY))
+    idf = {
+        term: math.log((1 + total) / (1 + df)) + 1
+        for term, df in document_frequency.items()
+        # A term in one document cannot link it to anything
+        if 1 < df <= max_df
+    }
+
+    vectors = []
+    for tf in counts:
+        vector = {term: (1 + math.log(freq)) * idf[term] for term, freq in tf.items()
+                  if term in idf and freq > 0}
+        norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+        vectors.append({term: value / norm for term, value in vector.items()})
+    return vectors
+
+
+def nearest_neighbors(vectors: Sequence[SparseVector], top_k: int) -> List[List[Tuple[int, float]]]:
+    """Top ``top_k`` (index, cosine) neighbours of every vector.
+
+    Dot products are accumulated through term posting lists, so only pairs
+    of documents sharing a term are ever compared.
+    """
+    postings: Dict[str, List[Tuple[int, float]]] = {}
+    for doc, vector in enumerate(vectors):
+        for term, value in vector.items():
+            postings.setdefault(term, []).append((doc, value))
+
+    neighbors = []
+    for doc, vector in enumerate(vectors):
+        scores: Dict[int, float] = {}
+        for term, value in vector.items():
+            for other, other_value in postings[term]:
+                if other != doc:
+                    scores[other] = scores.get(other, 0.0) + value * other_value
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+        neighbors.append(best)
+    return neighbors
+
+
+class RelatedService:
+    """Service building the ``phrase_neighbors`` table and reading from it."""
+
+    def build(self, top_k: int = 5, batch_size: int = 1000) -> Dict:
+        """Recompute the neighbour table for the whole corpus.
+
+        Returns row counts and timings in milliseconds.
+        """
+        timings: Dict[str, float] = {}
+
+        started = time.perf_counter()
+        rows = db.session.query(
+            PhraseologicalEntry.id,
+            PhraseologicalEntry.phrase,
+            PhraseologicalEntry.meanings,
+            PhraseologicalEntry.etymology,
+        ).order_by(PhraseologicalEntry.id).all()
+        ids = [row.id for row in rows]
+        timings['load'] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        vectors = tfidf_vectors([
+            (phrase, ' '.join(m for m in meanings or [] if isinstance(m, str)), etymology or '')
+            for _, phrase, meanings, etymology in rows
+        ])
+        timings['vectorize'] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        neighbors = nearest_neighbors(vectors, top_k)
+        timings['neighbors'] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        records = [
+            {'phrase_id': ids[doc], 'rank': rank, 'neighbor_id': ids[other], 'score': score}
+            for doc, best in enumerate(neighbors)
+            for rank, (other, score) in enumerate(best)
+        ]
+        try:
+            db.session.execute(db.delete(PhraseNeighbor))
+            for start in range(0, len(records), batch_size):
+                db.session.execute(db.insert(PhraseNeighbor), records[start:start + batch_size])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        timings['write'] = (time.perf_counter() - started) * 1000
+
+        # Pages showing related phrases are cached per corpus version
+        bump_corpus_version()
+        return {'phrases': len(ids), 'neighbors': len(records), 'timings': timings}
+
+    def get_related(self, phrase: PhraseologicalEntry, limit: int = 5) -> List[PhraseologicalEntry]:
+        """Most similar phrases via one lookup on the neighbour table's primary key.
+
+        Until the table has been built for this phrase, falls back to other
+        phrases of the same category.
+        """
+        related = PhraseologicalEntry.query.join(
+            PhraseNeighbor, PhraseNeighbor.neighbor_id == PhraseologicalEntry.id
+        ).filter(
+            PhraseNeighbor.phrase_id == phrase.id
+        ).order_by(PhraseNeighbor.rank).limit(limit).all()
+        if related or not phrase.category:
+            return related
+
+        return PhraseologicalEntry.query.filter(
+            PhraseologicalEntry.category == phrase.category,
+            PhraseologicalEntry.id != phrase.id
+        ).limit(limit).all()
+
+
+related_service = RelatedService()
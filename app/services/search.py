@@ -2,16 +2,25 @@
 from __future__ import annotations
 
 import re
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from unicodedata import normalize
 
+from flask import current_app
+
 from app.extensions import cache, db
 from app.models import PhraseologicalEntry
+from app.services.aho_corasick import AhoCorasick
+from app.services.corpus import VERSIONED_CACHE_TIMEOUT, CorpusIndex, versioned_name
+from app.services.search_backends import SEARCH_BACKENDS, SEARCH_FIELDS, SearchBackend
 
 
 class SearchService:
     """Service for searching phraseological entries."""
 
+    def __init__(self) -> None:
+        self._phrase_matcher = CorpusIndex(self._build_phrase_matcher, name='phrase matcher')
+        self._backends: Dict[str, SearchBackend] = {}
+
     @staticmethod
     def normalize_text(text: str) -> str:
         """Normalize text for comparison (remove punctuation, lowercase, etc.)."""
@@ -51,48 +60,63 @@ class SearchService:
         query: str, 
         limit: int = 20, 
         offset: int = 0,
-        search_fields: List[str] = None
+        search_fields: List[str] = None,
+        max_total: Optional[int] = None,
+        backend: Optional[str] = None,
     ) -> Tuple[List[PhraseologicalEntry], int]:
-        """Search phrases by query with ranking."""
+        """Search phrases by query with ranking.
+
+        The returned total is capped at ``max_total`` (``SEARCH_TOTAL_CAP`` by
+        default) so deep result sets are not counted row by row. ``backend``
+        overrides ``SEARCH_BACKEND``, e.g. ``'fuzzy'`` for typo-tolerant search.
+        """
         if not query or len(query.strip()) < 2:
             return [], 0
 
         query = query.strip()
-        search_fields = search_fields or ['phrase', 'meanings', 'etymology']
-        
-        # Build base query
-        base_query = PhraseologicalEntry.query
-        
-        # Add search conditions for each field
-        conditions = []
-        for field in search_fields:
-            if field == 'phrase':
-                conditions.append(PhraseologicalEntry.phrase.ilike(f'%{query}%'))
-            elif field == 'meanings':
-                # Search in JSON meanings array
-                conditions.append(db.cast(PhraseologicalEntry.meanings, db.Text).ilike(f'%{query}%'))
-            elif field == 'etymology':
-                conditions.append(PhraseologicalEntry.etymology.ilike(f'%{query}%'))
+        search_fields = search_fields or list(SEARCH_FIELDS)
         
-        # Apply conditions with OR
-        from sqlalchemy import or_
-        base_query = base_query.filter(or_(*conditions))
+        if max_total is None:
+            max_total = current_app.config.get('SEARCH_TOTAL_CAP')
         
-        # Count total results
-        total = base_query.count()
+        # Ranking and counting happen inside the configured backend
+        ids, total = self.get_backend(backend).search(query, limit, offset, search_fields, max_total)
         
-        # Apply ranking and pagination
-        # Prioritize exact phrase matches, then partial matches
-        results = base_query.order_by(
-            # Exact phrase match first
-            PhraseologicalEntry.phrase.ilike(f'%{query}%').desc(),
-            # Then by phrase length (shorter phrases first)
-            db.func.length(PhraseologicalEntry.phrase).asc(),
-            # Then alphabetically
-            PhraseologicalEntry.phrase.asc()
-        ).offset(offset).limit(limit).all()
-        
-        return results, total
+        return PhraseologicalEntry.get_by_ids(ids), total
+
+    def suggest_corrections(self, query: str, limit: int = 5) -> List[PhraseologicalEntry]:
+        """Phrases close to a (possibly misspelled) query, for "did you mean"."""
+        if not query or len(query.strip()) < 2:
+            return []
+        ids, _ = self.get_backend('fuzzy').search(query.strip(), limit=limit)
+        # Suggestions link to phrase pages; rows not backfilled yet have no slug
+        return [phrase for phrase in PhraseologicalEntry.get_by_ids(ids) if phrase.slug]
+
+    def get_backend(self, name: Optional[str] = None) -> SearchBackend:
+        """Return the backend named ``name`` or the configured ``SEARCH_BACKEND``."""
+        name = name or current_app.config.get('SEARCH_BACKEND', 'sql')
+        backend = self._backends.get(name)
+        if backend is None:
+            if name not in SEARCH_BACKENDS:
+                raise ValueError(f'Unknown search backend: {name}')
+            backend = self._backends.setdefault(name, SEARCH_BACKENDS[name]())
+        return backend
+
+    def _build_phrase_matcher(self) -> Tuple[AhoCorasick, Dict[int, str]]:
+        """Compile every normalized phrase into a single automaton."""
+        normalized_phrases = {}
+        for phrase_id, phrase in db.session.query(
+            PhraseologicalEntry.id, PhraseologicalEntry.phrase
+        ):
+            normalized_phrase = self.normalize_text(phrase)
+            if normalized_phrase:
+                normalized_phrases[phrase_id] = normalized_phrase
+
+        automaton = AhoCorasick.from_patterns(
+            (normalized_phrase, phrase_id)
+            for phrase_id, normalized_phrase in normalized_phrases.items()
+        )
+        return automaton, normalized_phrases
 
     def search_in_text(
         self, 
@@ -106,44 +130,50 @@ class SearchService:
         # Normalize input text
         normalized_text = self.normalize_text(text)
         
-        # Get all phrases from database
-        all_phrases = PhraseologicalEntry.query.all()
+        # Single pass over the text finds every occurrence of every phrase
+        automaton, normalized_phrases = self._phrase_matcher.get()
+        positions_by_id: Dict[int, List[int]] = {}
+        for phrase_id, start in automaton.finditer(normalized_text):
+            positions_by_id.setdefault(phrase_id, []).append(start)
+        
+        if not positions_by_id:
+            return []
+        
+        # Load only the phrases that actually occur in the text
+        phrases = PhraseologicalEntry.query.filter(
+            PhraseologicalEntry.id.in_(positions_by_id)
+        ).all()
         
         matches = []
         
-        for phrase in all_phrases:
-            normalized_phrase = self.normalize_text(phrase.phrase)
+        for phrase in phrases:
+            normalized_phrase = normalized_phrases[phrase.id]
+            positions = positions_by_id[phrase.id]
             
-            # Check if phrase exists in text
-            if normalized_phrase in normalized_text:
-                # Count occurrences
-                count = normalized_text.count(normalized_phrase)
-                
-                matches.append({
-                    'phrase': phrase,
-                    'count': count,
-                    'normalized_phrase': normalized_phrase,
-                    'match_positions': self._find_match_positions(normalized_text, normalized_phrase)
-                })
+            matches.append({
+                'phrase': phrase,
+                'count': self._count_non_overlapping(positions, len(normalized_phrase)),
+                'normalized_phrase': normalized_phrase,
+                'match_positions': positions,
+            })
         
         # Sort by count (descending) then phrase length (ascending)
         matches.sort(key=lambda x: (-x['count'], len(x['phrase'].phrase)))
         
         return matches
 
-    def _find_match_positions(self, text: str, pattern: str) -> List[int]:
-        """Find all starting positions of pattern in text."""
-        positions = []
-        start = 0
-        while True:
-            pos = text.find(pattern, start)
-            if pos == -1:
-                break
-            positions.append(pos)
-            start = pos + 1
-        return positions
-
-    @cache.memoize(timeout=300)
+    @staticmethod
+    def _count_non_overlapping(positions: List[int], length: int) -> int:
+        """Count occurrences the way ``str.count`` does (no overlaps)."""
+        count = 0
+        next_free = 0
+        for pos in positions:
+            if pos >= next_free:
+                count += 1
+                next_free = pos + length
+        return count
+
+    @cache.memoize(timeout=VERSIONED_CACHE_TIMEOUT, make_name=versioned_name)
     def get_popular_searches(self, limit: int = 10) -> List[str]:
         """Get popular search terms (could be enhanced with analytics)."""
         # For now, return some common phraseological terms
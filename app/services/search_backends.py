@@ -0,0 +1,420 @@
+"""Pluggable search backends used by ``SearchService.search_phrases``.
+
+Every backend answers ``search(query, limit, offset, search_fields, max_total)``
+with a page of ranked phrase IDs and the total number of matches. When
+``max_total`` is given the total is capped at that value, which lets the
+database stop counting early.
+"""
+from __future__ import annotations
+
+import math
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import or_
+
+from app.extensions import db
+from app.models import PhraseologicalEntry
+from app.services.corpus import CorpusIndex
+from app.services.fuzzy import TrigramIndex
+from app.services.stemmer import analyze, tokenize
+
+SEARCH_FIELDS = ('phrase', 'meanings', 'etymology')
+
+
+class SearchBackend:
+    """Base class for search backends."""
+
+    name = 'base'
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        search_fields: Optional[Sequence[str]] = None,
+        max_total: Optional[int] = None,
+    ) -> Tuple[List[int], int]:
+        raise NotImplementedError
+
+
+class SQLSearchBackend(SearchBackend):
+    """``ILIKE '%q%'`` scan over phrase, meanings and etymology."""
+
+    name = 'sql'
+
+    def search(self, query, limit=20, offset=0, search_fields=None, max_total=None):
+        search_fields = search_fields or SEARCH_FIELDS
+
+        conditions = []
+        for field in search_fields:
+            if field == 'phrase':
+                conditions.append(PhraseologicalEntry.phrase.ilike(f'%{query}%'))
+            elif field == 'meanings':
+                # Search in JSON meanings array
+                conditions.append(db.cast(PhraseologicalEntry.meanings, db.Text).ilike(f'%{query}%'))
+            elif field == 'etymology':
+                conditions.append(PhraseologicalEntry.etymology.ilike(f'%{query}%'))
+
+        base_query = db.session.query(PhraseologicalEntry.id).filter(or_(*conditions))
+        if max_total:
+            total = db.session.query(db.func.count()).select_from(
+                base_query.limit(max_total).subquery()
+            ).scalar()
+        else:
+            total = base_query.count()
+
+        rows = base_query.order_by(
+            # Exact phrase match first
+            PhraseologicalEntry.phrase.ilike(f'%{query}%').desc(),
+            # Then by phrase length (shorter phrases first)
+            db.func.length(PhraseologicalEntry.phrase).asc(),
+            # Then alphabetically
+            PhraseologicalEntry.phrase.asc()
+        ).offset(offset).limit(limit).all()
+
+        return [row.id for row in rows], total
+
+
+class InvertedIndex:
+    """Stemmed, field-aware inverted index with BM25F scoring.
+
+    ``postings[term][doc]`` holds one length-normalized term frequency per
+    field, so a query only touches the posting lists of its own terms.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    FIELD_WEIGHTS = {'phrase': 3.0, 'meanings': 1.5, 'etymology': 0.5}
+    # Added when the whole query occurs verbatim in the phrase itself.
+    PHRASE_MATCH_BOOST = 5.0
+    # Terms reached only through prefix expansion of the last query word.
+    PREFIX_MATCH_WEIGHT = 0.5
+
+    def __init__(self, documents: Sequence[Tuple[int, str, str, str]]) -> None:
+        self.doc_ids: List[int] = []
+        self.phrases: List[str] = []
+        self.postings: Dict[str, Dict[int, Tuple[float, ...]]] = {}
+
+        analyzed = []
+        totals = [0] * len(SEARCH_FIELDS)
+        for phrase_id, phrase, meanings, etymology in documents:
+            fields = [analyze(phrase), analyze(meanings), analyze(etymology)]
+            analyzed.append(fields)
+            for i, tokens in enumerate(fields):
+                totals[i] += len(tokens)
+            self.doc_ids.append(phrase_id)
+            self.phrases.append(' '.join(tokenize(phrase)))
+
+        count = len(analyzed) or 1
+        avg_lengths = [max(total / count, 1.0) for total in totals]
+
+        for doc, fields in enumerate(analyzed):
+            frequencies: Dict[str, List[int]] = {}
+            for i, tokens in enumerate(fields):
+                for token in tokens:
+                    frequencies.setdefault(token, [0] * len(SEARCH_FIELDS))[i] += 1
+            norms = [
+                1 - self.B + self.B * len(tokens) / avg_lengths[i]
+                for i, tokens in enumerate(fields)
+            ]
+            for token, tfs in frequencies.items():
+                self.postings.setdefault(token, {})[doc] = tuple(
+                    tf / norms[i] for i, tf in enumerate(tfs)
+                )
+
+        self.terms = sorted(self.postings)
+        self.idf = {
+            term: math.log(1 + (len(analyzed) - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        """Return indexed terms starting with ``prefix``."""
+        start = bisect_left(self.terms, prefix)
+        expanded = []
+        for term in self.terms[start:]:
+            if not term.startswith(prefix):
+                break
+            expanded.append(term)
+        return expanded
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        search_fields: Optional[Sequence[str]] = None,
+        max_total: Optional[int] = None,
+    ) -> Tuple[List[int], int]:
+        tokens = tokenize(query)
+        if not tokens:
+            return [], 0
+
+        weights = [
+            self.FIELD_WEIGHTS[field] if field in (search_fields or SEARCH_FIELDS) else 0.0
+            for field in SEARCH_FIELDS
+        ]
+
+        # Every query word must match; the last one may still be being typed,
+        # so it also matches any indexed term it is a prefix of.
+        scores: Optional[Dict[int, float]] = None
+        for position, token in enumerate(tokens):
+            stemmed = analyze(token)[0]
+            terms = {stemmed: 1.0}
+            if position == len(tokens) - 1:
+                for term in self._expand_prefix(token):
+                    terms.setdefault(term, self.PREFIX_MATCH_WEIGHT)
+
+            token_scores: Dict[int, float] = {}
+            for term, term_weight in terms.items():
+                idf = self.idf.get(term)
+                if idf is None:
+                    continue
+                for doc, tfs in self.postings[term].items():
+                    tf = sum(w * t for w, t in zip(weights, tfs))
+                    if tf <= 0:
+                        continue
+                    score = term_weight * idf * tf * (self.K1 + 1) / (tf + self.K1)
+                    if score > token_scores.get(doc, 0.0):
+                        token_scores[doc] = score
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    doc: score + token_scores[doc]
+                    for doc, score in scores.items() if doc in token_scores
+                }
+            if not scores:
+                return [], 0
+
+        if weights[0]:
+            # Whole words get the full boost ("за" in "водить за нос"); a match
+            # that only starts a word ("за" in "застать") gets the prefix share.
+            needle = ' ' + ' '.join(tokens)
+            for doc in scores:
+                phrase = f' {self.phrases[doc]} '
+                if needle + ' ' in phrase:
+                    scores[doc] += self.PHRASE_MATCH_BOOST
+                elif needle in phrase:
+                    scores[doc] += self.PHRASE_MATCH_BOOST * self.PREFIX_MATCH_WEIGHT
+
+        ranked = sorted(
+            scores,
+            key=lambda doc: (-scores[doc], len(self.phrases[doc]), self.phrases[doc]),
+        )
+        total = min(len(ranked), max_total) if max_total else len(ranked)
+        return [self.doc_ids[doc] for doc in ranked[offset:offset + limit]], total
+
+
+def _load_documents() -> List[Tuple[int, str, str, str]]:
+    rows = db.session.query(
+        PhraseologicalEntry.id,
+        PhraseologicalEntry.phrase,
+        PhraseologicalEntry.meanings,
+        PhraseologicalEntry.etymology,
+    ).order_by(PhraseologicalEntry.id)
+    return [
+        (phrase_id, phrase, ' '.join(meanings or []), etymology or '')
+        for phrase_id, phrase, meanings, etymology in rows
+    ]
+
+
+class InvertedIndexBackend(SearchBackend):
+    """In-memory inverted index; no database round trip per query."""
+
+    name = 'index'
+
+    def __init__(self) -> None:
+        self.index = CorpusIndex(lambda: InvertedIndex(_load_documents()), name='search index')
+
+    def search(self, query, limit=20, offset=0, search_fields=None, max_total=None):
+        return self.index.get().search(query, limit, offset, search_fields, max_total)
+
+
+class FuzzySearchBackend(SearchBackend):
+    """Typo-tolerant phrase search over an in-memory trigram index.
+
+    Only phrases are searched; results are ordered by edit distance.
+    """
+
+    name = 'fuzzy'
+
+    def __init__(self) -> None:
+        self.index = CorpusIndex(
+            lambda: TrigramIndex(db.session.query(PhraseologicalEntry.id, PhraseologicalEntry.phrase).all()),
+            name='trigram index',
+        )
+
+    def search(self, query, limit=20, offset=0, search_fields=None, max_total=None):
+        index = self.index.get()
+        matches = index.search(query, limit=max(max_total or index.candidates, offset + limit))
+        return [phrase_id for phrase_id, _ in matches[offset:offset + limit]], len(matches)
+
+
+class FulltextSearchBackend(SearchBackend):
+    """Database full-text search: MySQL ``MATCH ... AGAINST`` or SQLite FTS5.
+
+    On MySQL the ``meanings_text`` generated column and the ngram FULLTEXT
+    indexes from ``db/sql/add_fulltext_indexes.sql`` must exist. On SQLite
+    an FTS5 table kept in sync by triggers is created on first use, so the
+    same code path runs against ``TestingConfig``.
+    """
+
+    name = 'fulltext'
+
+    # One FULLTEXT index per column list that MATCH() may name.
+    MYSQL_COLUMNS = {
+        'phrase': 'phrase',
+        'meanings': 'meanings_text',
+        'etymology': 'etymology',
+    }
+    MYSQL_WEIGHTS = {'phrase': 3.0, 'meanings': 1.5, 'etymology': 0.5}
+    # ngram_token_size defaults to 2; shorter words cannot match anything.
+    MYSQL_MIN_TOKEN = 2
+
+    FTS_TABLE = 'phraseological_fts'
+    FTS_COLUMNS = {'phrase': 'phrase', 'meanings': 'meanings_text', 'etymology': 'etymology'}
+    FTS_WEIGHTS = (3.0, 1.5, 0.5)
+    FTS_SCHEMA = (
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            phrase, meanings_text, etymology,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON phraseological_dict BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, phrase, meanings_text, etymology) VALUES (
+                NEW.id, NEW.phrase,
+                (SELECT group_concat(value, ' ') FROM json_each(NEW.meanings)),
+                NEW.etymology
+            );
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON phraseological_dict BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = OLD.id;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON phraseological_dict BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = OLD.id;
+            INSERT INTO {FTS_TABLE}(rowid, phrase, meanings_text, etymology) VALUES (
+                NEW.id, NEW.phrase,
+                (SELECT group_concat(value, ' ') FROM json_each(NEW.meanings)),
+                NEW.etymology
+            );
+        END""",
+    )
+    FTS_POPULATE = f"""
+        INSERT INTO {FTS_TABLE}(rowid, phrase, meanings_text, etymology)
+        SELECT id, phrase,
+               (SELECT group_concat(value, ' ') FROM json_each(phraseological_dict.meanings)),
+               etymology
+        FROM phraseological_dict
+    """
+
+    def __init__(self) -> None:
+        self._fts_ready = False
+
+    def search(self, query, limit=20, offset=0, search_fields=None, max_total=None):
+        search_fields = [f for f in (search_fields or SEARCH_FIELDS) if f in SEARCH_FIELDS]
+        dialect = db.engine.dialect.name
+        if dialect == 'mysql':
+            return self._search_mysql(query, limit, offset, search_fields, max_total)
+        if dialect == 'sqlite':
+            return self._search_sqlite(query, limit, offset, search_fields, max_total)
+        raise RuntimeError(f'Full-text search is not supported on {dialect}')
+
+    @staticmethod
+    def _count(from_where: str, params: Dict, max_total: Optional[int]) -> int:
+        """COUNT(*) over ``from_where``, stopping after ``max_total`` rows."""
+        if max_total:
+            sql = f'SELECT COUNT(*) FROM (SELECT 1 {from_where} LIMIT :max_total) AS capped'
+            params = {**params, 'max_total': max_total}
+        else:
+            sql = f'SELECT COUNT(*) {from_where}'
+        return db.session.execute(db.text(sql), params).scalar()
+
+    def _search_mysql(self, query, limit, offset, search_fields, max_total):
+        tokens = [t for t in tokenize(query) if len(t) >= self.MYSQL_MIN_TOKEN]
+        if not tokens or not search_fields:
+            return [], 0
+
+        # Boolean mode: every word is required; ngram turns each into a phrase search.
+        against = ' '.join(f'+"{token}"' for token in tokens)
+        matches = [
+            f'MATCH({self.MYSQL_COLUMNS[field]}) AGAINST (:q IN BOOLEAN MODE)'
+            for field in search_fields
+        ]
+        score = ' + '.join(
+            f'{self.MYSQL_WEIGHTS[field]} * {match}'
+            for field, match in zip(search_fields, matches)
+        )
+        where = ' OR '.join(matches)
+
+        total = self._count(f'FROM phraseological_dict WHERE {where}', {'q': against}, max_total)
+        if not total:
+            return [], 0
+
+        rows = db.session.execute(
+            db.text(
+                f'SELECT id, {score} AS score FROM phraseological_dict WHERE {where} '
+                'ORDER BY score DESC, CHAR_LENGTH(phrase), phrase '
+                'LIMIT :limit OFFSET :offset'
+            ),
+            {'q': against, 'limit': limit, 'offset': offset},
+        )
+        return [row.id for row in rows], total
+
+    def _ensure_fts(self) -> None:
+        """Create and fill the FTS5 table and its sync triggers once per process."""
+        if self._fts_ready:
+            return
+        exists = db.session.execute(
+            db.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': self.FTS_TABLE},
+        ).scalar()
+        for statement in self.FTS_SCHEMA:
+            db.session.execute(db.text(statement))
+        if not exists:
+            db.session.execute(db.text(self.FTS_POPULATE))
+        db.session.commit()
+        self._fts_ready = True
+
+    def _search_sqlite(self, query, limit, offset, search_fields, max_total):
+        tokens = tokenize(query)
+        if not tokens or not search_fields:
+            return [], 0
+        self._ensure_fts()
+
+        # Implicit AND of quoted words; the last word may be incomplete.
+        terms = [f'"{token}"' for token in tokens]
+        terms[-1] += '*'
+        columns = ' '.join(self.FTS_COLUMNS[field] for field in search_fields)
+        match = f'{{{columns}}} : ({" ".join(terms)})'
+        weights = ', '.join(str(w) for w in self.FTS_WEIGHTS)
+
+        total = self._count(
+            f'FROM {self.FTS_TABLE} WHERE {self.FTS_TABLE} MATCH :q', {'q': match}, max_total
+        )
+        if not total:
+            return [], 0
+
+        rows = db.session.execute(
+            db.text(
+                f'SELECT f.rowid AS id FROM {self.FTS_TABLE} f '
+                'JOIN phraseological_dict p ON p.id = f.rowid '
+                f'WHERE {self.FTS_TABLE} MATCH :q '
+                f'ORDER BY bm25({self.FTS_TABLE}, {weights}), LENGTH(p.phrase), p.phrase '
+                'LIMIT :limit OFFSET :offset'
+            ),
+            {'q': match, 'limit': limit, 'offset': offset},
+        )
+        return [row.id for row in rows], total
+
+
+SEARCH_BACKENDS = {
+    SQLSearchBackend.name: SQLSearchBackend,
+    InvertedIndexBackend.name: InvertedIndexBackend,
+    FulltextSearchBackend.name: FulltextSearchBackend,
+    FuzzySearchBackend.name: FuzzySearchBackend,
+}
@@ -106,8 +106,18 @@ class SEOService:
             }
         }
 
-    def get_phrase_metadata(self, phrase: Any, phrase_image: Optional[str] = None) -> Dict[str, Any]:
-        """Generate metadata for phrase detail pages."""
+    def get_phrase_metadata(
+        self,
+        phrase: Any,
+        phrase_image: Optional[str] = None,
+        og_image: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Generate metadata for phrase detail pages.
+
+        ``og_image`` is the prebuilt Open Graph crop (``path``, ``width``,
+        ``height``) from the image manifest; it is preferred over the
+        full-size ``phrase_image``.
+        """
         phrase_slug = phrase.slug
         overrides = self.config.get('pages', {}).get('phrases', {}).get(phrase_slug, {})
         
@@ -120,7 +130,11 @@ class SEOService:
         
         # Determine image URL
         image_url = self._get_absolute_url(url_for('static', filename='images/og-phrase.jpg'))
-        if phrase_image:
+        image_width = image_height = None
+        if og_image:
+            image_url = self._get_absolute_url(url_for('static', filename=og_image['path']))
+            image_width, image_height = og_image.get('width'), og_image.get('height')
+        elif phrase_image:
             image_url = self._get_absolute_url(url_for('static', filename=phrase_image))
         
         return {
@@ -134,6 +148,8 @@ class SEOService:
                 'url': canonical,
                 'type': 'article',
                 'image': image_url,
+                'image_width': image_width,
+                'image_height': image_height,
             },
             'twitter': {
                 'card': 'summary_large_image',
@@ -0,0 +1,190 @@
+"""Memoization with single-flight recomputation and stale-while-revalidate."""
+from __future__ import annotations
+
+import functools
+import hashlib
+import math
+import random
+import threading
+import time
+import uuid
+from typing import Any, Callable, Optional, Tuple
+
+from flask import current_app
+from flask_caching.backends import NullCache, SimpleCache
+
+from app.extensions import cache
+from app.services.corpus import versioned_name
+
+# Lock keys must live in the shared backend only (see TieredCache)
+LOCK_PREFIX = 'lock/'
+POLL_INTERVAL = 0.05
+
+# Deletes the lock only while it still holds our token, atomically
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+# Makes take/compare-and-delete atomic for caches living in this process
+_process_lock = threading.Lock()
+
+
+def _shared_backend() -> Any:
+    """The backend holding the locks (the remote tier of a TieredCache)."""
+    backend = cache.cache
+    backend = getattr(backend, 'backend', backend)  # unwrap the metrics proxy
+    return getattr(backend, 'remote', backend)
+
+
+def _in_process(backend: Any) -> bool:
+    return isinstance(backend, (SimpleCache, NullCache))
+
+
+def _acquire(lock_key: str, timeout: int) -> Optional[str]:
+    """Take a lock shared by every process using the cache backend.
+
+    ``add`` is atomic in Redis (``SET NX``) and, under ``_process_lock``, in
+    the in-process caches, so only one caller gets the token.
+    """
+    token = uuid.uuid4().hex
+    try:
+        if _in_process(_shared_backend()):
+            with _process_lock:
+                return token if cache.add(lock_key, token, timeout=timeout) else None
+        return token if cache.add(lock_key, token, timeout=timeout) else None
+    except Exception:
+        current_app.logger.exception('Could not take lock %s', lock_key)
+        return None
+
+
+def _release(lock_key: str, token: str) -> None:
+    """Drop the lock if it is still ours.
+
+    Checking and deleting must be one step: if the lock expired and another
+    worker took it in between, a plain ``get`` + ``delete`` would remove that
+    worker's lock. Redis runs ``RELEASE_SCRIPT``; backends without a
+    compare-and-delete just let the lock expire after ``lock_timeout``.
+    """
+    backend = _shared_backend()
+    try:
+        if hasattr(backend, '_write_client'):
+            backend._write_client.eval(
+                RELEASE_SCRIPT, 1, backend.key_prefix + lock_key, backend.serializer.dumps(token)
+            )
+        elif _in_process(backend):
+            with _process_lock:
+                if cache.get(lock_key) == token:
+                    cache.delete(lock_key)
+    except Exception:
+        current_app.logger.exception('Could not release lock %s', lock_key)
+
+
+def memoize(
+    timeout: int = 3600,
+    make_name: Callable[[str], str] = versioned_name,
+    stale_timeout: int = 3600,
+    beta: float = 1.0,
+    lock_timeout: int = 30,
+    wait: float = 5.0,
+) -> Callable:
+    """Drop-in for ``cache.memoize`` that recomputes each value only once at a time.
+
+    * A missing value (first call, new corpus version, evicted entry) is
+      computed by the caller holding a lock in the cache backend; other
+      callers, in any worker, poll for the result for up to ``wait`` seconds
+      before computing it themselves.
+    * For ``stale_timeout`` seconds after ``timeout`` the old value is still
+      returned while one caller refreshes it in a background thread.
+    * With ``beta > 0`` a fresh value is refreshed early with a probability
+      that grows as it nears expiry and with how long it took to compute
+      (XFetch), so a hot key usually never goes stale at all.
+
+    ``make_name`` defaults to ``versioned_name``, so a new corpus version is
+    never answered with data of the previous one. Methods are keyed without
+    ``self``; use ``delete_cached(*args)`` to drop an entry.
+    """
+
+    def decorator(f: Callable) -> Callable:
+        is_method = '.' in f.__qualname__ and '<locals>' not in f.__qualname__
+        fname = f'{f.__module__}.{f.__qualname__}'
+
+        def make_key(args: Tuple, kwargs: dict) -> str:
+            arguments = hashlib.md5(repr((args, sorted(kwargs.items()))).encode('utf-8')).hexdigest()
+            return f'memo/{make_name(fname)}/{arguments}'
+
+        def compute(key: str, args: Tuple, kwargs: dict) -> Any:
+            started = time.perf_counter()
+            value = f(*args, **kwargs)
+            delta = time.perf_counter() - started
+            try:
+                cache.set(key, (value, time.time() + timeout, delta), timeout=timeout + stale_timeout)
+            except Exception:
+                current_app.logger.exception('Could not store %s', fname)
+            return value
+
+        def refresh_in_background(key: str, args: Tuple, kwargs: dict) -> None:
+            lock_key = LOCK_PREFIX + key
+            token = _acquire(lock_key, lock_timeout)
+            if token is None:
+                return  # Someone else is already refreshing it
+            app = current_app._get_current_object()
+
+            def run() -> None:
+                with app.app_context():
+                    try:
+                        compute(key, args, kwargs)
+                    except Exception:
+                        app.logger.exception('Background refresh of %s failed', fname)
+                    finally:
+                        _release(lock_key, token)
+
+            threading.Thread(target=run, name=f'refresh {fname}', daemon=True).start()
+
+        @functools.wraps(f)
+        def decorated(*args, **kwargs):
+            key_args = args[1:] if is_method else args
+            key = make_key(key_args, kwargs)
+            try:
+                entry = cache.get(key)
+            except Exception:
+                current_app.logger.exception('Cache lookup for %s failed', fname)
+                return f(*args, **kwargs)
+
+            if entry is not None:
+                value, expires_at, delta = entry
+                now = time.time()
+                if now >= expires_at or (
+                    beta > 0 and now - delta * beta * math.log(1.0 - random.random()) >= expires_at
+                ):
+                    refresh_in_background(key, args, kwargs)
+                return value
+
+            lock_key = LOCK_PREFIX + key
+            token = _acquire(lock_key, lock_timeout)
+            if token is not None:
+                try:
+                    return compute(key, args, kwargs)
+                finally:
+                    _release(lock_key, token)
+
+            # Another caller is computing it; wait for its result
+            deadline = time.monotonic() + wait
+            while time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                entry = cache.get(key)
+                if entry is not None:
+                    return entry[0]
+            current_app.logger.warning('Gave up waiting for %s; computing it here', fname)
+            return compute(key, args, kwargs)
+
+        def delete_cached(*args, **kwargs) -> None:
+            """Drop the entry for these arguments (without ``self`` for methods)."""
+            cache.delete(make_key(args, kwargs))
+
+        decorated.uncached = f
+        decorated.delete_cached = delete_cached
+        return decorated
+
+    return decorator
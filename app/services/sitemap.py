@@ -0,0 +1,226 @@
+"""Sitemap service writing a sitemap index with chunked, gzipped child sitemaps."""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import PhraseologicalEntry
+from app.services.categories import category_service
+from app.services.corpus import get_corpus_version
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+# The sitemap protocol allows at most 50,000 URLs per file.
+MAX_CHUNK_SIZE = 50000
+
+
+class SitemapService:
+    """Builds sitemaps into a directory and serves them from there.
+
+    Layout of ``SITEMAP_DIR``::
+
+        manifest.json            build signature, ETag, Last-Modified, file list
+        sitemap.xml.gz           sitemap index
+        sitemap-pages.xml.gz     home and category pages
+        sitemap-phrases-N.xml.gz phrase pages, SITEMAP_CHUNK_SIZE URLs each
+
+    Files are rebuilt only when the corpus version (or the site URL or the
+    chunk size) changes, and are kept gzipped so they can be sent as-is (or
+    served directly by nginx).
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # ((directory, signature), manifest) of the last build this worker saw
+        self._manifest: Optional[Tuple[Tuple[str, str], Dict]] = None
+
+    @property
+    def site_url(self) -> str:
+        return os.getenv('SITE_URL', 'https://frazeologizm.ru').rstrip('/')
+
+    def get_directory(self) -> str:
+        return current_app.config.get('SITEMAP_DIR') or os.path.join(
+            current_app.instance_path, 'sitemaps'
+        )
+
+    def _chunk_size(self) -> int:
+        return min(current_app.config.get('SITEMAP_CHUNK_SIZE', 10000), MAX_CHUNK_SIZE)
+
+    def _read_manifest(self) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.get_directory(), self.MANIFEST), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _signature(self) -> str:
+        """Identify the corpus version and the settings the sitemap depends on."""
+        parts = [self.site_url, self._chunk_size(), get_corpus_version()]
+        return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+    def get_manifest(self, rebuild: bool = False) -> Dict:
+        """Return the manifest of an up-to-date build, building if needed.
+
+        The manifest is kept in memory while the corpus version is
+        unchanged; the directory is only consulted when it changes (another
+        worker may have built it already) or with ``rebuild``.
+        """
+        key = (self.get_directory(), self._signature())
+        cached = self._manifest
+        if not rebuild and cached is not None and cached[0] == key:
+            return cached[1]
+
+        with self._lock:
+            cached = self._manifest
+            if not rebuild and cached is not None and cached[0] == key:
+                return cached[1]
+            manifest = None if rebuild else self._read_manifest()
+            if not manifest or manifest.get('signature') != key[1]:
+                manifest = self.build(key[1])
+            self._manifest = (key, manifest)
+            return manifest
+
+    def get_file(self, name: str) -> Optional[Tuple[str, Dict]]:
+        """Return the gzipped file path for a sitemap name and the manifest."""
+        manifest = self.get_manifest()
+        if name not in manifest['files']:
+            return None
+        path = os.path.join(self.get_directory(), f'{name}.gz')
+        if not os.path.exists(path):
+            # Removed behind our back (cleanup, new deploy directory)
+            manifest = self.get_manifest(rebuild=True)
+            if name not in manifest['files']:
+                return None
+        return path, manifest
+
+    # Building
+
+    @staticmethod
+    def _url_entry(loc: str, lastmod: Optional[datetime], changefreq: str, priority: str) -> str:
+        lastmod_xml = f'    <lastmod>{lastmod.strftime("%Y-%m-%d")}</lastmod>\n' if lastmod else ''
+        return (
+            '  <url>\n'
+            f'    <loc>{escape(loc)}</loc>\n'
+            f'{lastmod_xml}'
+            f'    <changefreq>{changefreq}</changefreq>\n'
+            f'    <priority>{priority}</priority>\n'
+            '  </url>\n'
+        )
+
+    def _write_gzip(self, name: str, lines: Iterator[str]) -> None:
+        """Stream ``lines`` into ``<name>.gz``, replacing the file atomically."""
+        directory = self.get_directory()
+        path = os.path.join(directory, f'{name}.gz')
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=9) as f:
+            for line in lines:
+                f.write(line)
+        os.replace(tmp_path, path)
+
+    def _urlset(self, entries: Iterator[str]) -> Iterator[str]:
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield f'<urlset xmlns="{SITEMAP_NS}">\n'
+        yield from entries
+        yield '</urlset>\n'
+
+    def _page_entries(self, last_modified: Optional[datetime]) -> Iterator[str]:
+        # Home page
+        yield self._url_entry(f'{self.site_url}/', last_modified, 'daily', '1.0')
+
+        # Category pages, dated by their most recently updated phrase
+        category_updates = dict(db.session.query(
+            PhraseologicalEntry.category, db.func.max(PhraseologicalEntry.updated_at)
+        ).group_by(PhraseologicalEntry.category))
+        for cat in category_service.get_all_categories_enriched():
+            yield self._url_entry(
+                f'{self.site_url}/kategoria/{cat["slug"]}/',
+                category_updates.get(cat['key'], last_modified),
+                'weekly',
+                '0.8',
+            )
+
+    def _phrase_rows(self) -> Iterator[Tuple[str, Optional[datetime]]]:
+        """Stream (slug, updated_at) without loading full ORM objects."""
+        query = db.session.query(
+            PhraseologicalEntry.slug, PhraseologicalEntry.updated_at
+        ).filter(
+            PhraseologicalEntry.slug.isnot(None)
+        ).order_by(PhraseologicalEntry.id).execution_options(yield_per=1000)
+        yield from query
+
+    def build(self, signature: Optional[str] = None) -> Dict:
+        """Write the index and all child sitemaps and return the new manifest."""
+        signature = signature or self._signature()
+        directory = self.get_directory()
+        os.makedirs(directory, exist_ok=True)
+
+        last_modified = db.session.query(db.func.max(PhraseologicalEntry.updated_at)).scalar()
+        files: List[str] = ['sitemap-pages.xml']
+        self._write_gzip('sitemap-pages.xml', self._urlset(self._page_entries(last_modified)))
+
+        chunk_size = self._chunk_size()
+        rows = self._phrase_rows()
+        chunk_number = 0
+        exhausted = False
+        while not exhausted:
+            chunk: List[str] = []
+            for slug, updated_at in rows:
+                chunk.append(self._url_entry(
+                    f'{self.site_url}/frazeologizm/{slug}/', updated_at, 'monthly', '0.6'
+                ))
+                if len(chunk) == chunk_size:
+                    break
+            else:
+                exhausted = True
+            if chunk:
+                chunk_number += 1
+                name = f'sitemap-phrases-{chunk_number}.xml'
+                self._write_gzip(name, self._urlset(iter(chunk)))
+                files.append(name)
+
+        lastmod_xml = (
+            f'    <lastmod>{last_modified.strftime("%Y-%m-%d")}</lastmod>\n'
+            if last_modified else ''
+        )
+        index_lines = ['<?xml version="1.0" encoding="UTF-8"?>\n', f'<sitemapindex xmlns="{SITEMAP_NS}">\n']
+        for name in files:
+            index_lines.append(
+                '  <sitemap>\n'
+                f'    <loc>{escape(self.site_url)}/{name}</loc>\n'
+                f'{lastmod_xml}'
+                '  </sitemap>\n'
+            )
+        index_lines.append('</sitemapindex>\n')
+        self._write_gzip('sitemap.xml', iter(index_lines))
+
+        # Remove phrase chunks left over from a previous, larger build
+        for stale in os.listdir(directory):
+            if (stale.startswith('sitemap-phrases-') and stale.endswith('.gz')
+                    and stale[:-len('.gz')] not in files):
+                os.remove(os.path.join(directory, stale))
+
+        manifest = {
+            'signature': signature,
+            'etag': signature[:16],
+            'last_modified': last_modified.isoformat() if last_modified else None,
+            'files': ['sitemap.xml', *files],
+        }
+        tmp_path = os.path.join(directory, f'{self.MANIFEST}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(directory, self.MANIFEST))
+        self._manifest = ((directory, signature), manifest)
+        return manifest
+
+
+sitemap_service = SitemapService()
@@ -1,40 +1,82 @@
-"""Slug service for mapping phrase slugs to IDs with caching."""
+"""Slug service for resolving phrase slugs through the indexed slug column."""
 from __future__ import annotations
 
 from typing import Dict, Optional
 
-from app.extensions import cache, db
+from app.extensions import db
 from app.models import PhraseologicalEntry
+from app.services import single_flight
 
 
 class SlugService:
-    """Service for managing phrase slug to ID mappings with caching."""
+    """Service for looking up phrases by their persisted slug."""
 
-    @cache.memoize(timeout=3600)
+    # A full table read: only one caller per corpus version loads it
+    @single_flight.memoize()
     def get_slug_to_id_mapping(self) -> Dict[str, int]:
         """Get all phrase slug to ID mappings."""
-        phrases = PhraseologicalEntry.query.all()
-        return {phrase.slug: phrase.id for phrase in phrases}
+        rows = db.session.query(PhraseologicalEntry.slug, PhraseologicalEntry.id).filter(
+            PhraseologicalEntry.slug.isnot(None)
+        )
+        return {slug: phrase_id for slug, phrase_id in rows}
 
     def get_id_by_slug(self, slug: str) -> Optional[int]:
-        """Get phrase ID by slug, using cache first."""
-        mapping = self.get_slug_to_id_mapping()
-        return mapping.get(slug)
+        """Get phrase ID by slug with a single indexed lookup."""
+        return db.session.query(PhraseologicalEntry.id).filter_by(slug=slug).scalar()
 
     def get_phrase_by_slug(self, slug: str) -> Optional[PhraseologicalEntry]:
-        """Get phrase by slug, using cache first."""
-        phrase_id = self.get_id_by_slug(slug)
-        if phrase_id:
-            return PhraseologicalEntry.query.get(phrase_id)
-        return None
+        """Get phrase by slug with a single indexed lookup."""
+        return PhraseologicalEntry.query.filter_by(slug=slug).first()
 
     def clear_cache(self) -> None:
         """Clear the slug mapping cache."""
-        cache.delete_memoized(self.get_slug_to_id_mapping)
+        self.get_slug_to_id_mapping.delete_cached()
 
     def refresh_for_phrase(self, phrase: PhraseologicalEntry) -> None:
-        """Refresh cache for a specific phrase (useful after insert/update)."""
+        """Refresh cache for a specific phrase.
+
+        Committing a phrase change already bumps the corpus version, which
+        retires the mapping; this is only needed after raw SQL edits.
+        """
         self.clear_cache()
 
+    def backfill(self, batch_size: int = 500, regenerate: bool = False) -> int:
+        """Fill the slug column for rows that do not have one yet.
+
+        With ``regenerate`` every slug is recomputed from its phrase. Returns
+        the number of rows updated.
+        """
+        query = db.session.query(
+            PhraseologicalEntry.id, PhraseologicalEntry.phrase, PhraseologicalEntry.slug
+        ).order_by(PhraseologicalEntry.id)
+        rows = query.all()
+
+        taken = set() if regenerate else {slug for _, _, slug in rows if slug}
+        updates = []
+        for phrase_id, phrase, slug in rows:
+            if slug and not regenerate:
+                continue
+            new_slug = PhraseologicalEntry.make_slug(phrase, taken)
+            taken.add(new_slug)
+            if new_slug != slug:
+                updates.append({'id': phrase_id, 'slug': new_slug})
+
+        if regenerate and updates:
+            # Clear first so swapped slugs do not trip the unique index mid-batch.
+            db.session.execute(
+                db.update(PhraseologicalEntry)
+                .where(PhraseologicalEntry.id.in_([u['id'] for u in updates]))
+                .values(slug=None)
+            )
+
+        for start in range(0, len(updates), batch_size):
+            db.session.execute(
+                db.update(PhraseologicalEntry),
+                updates[start:start + batch_size],
+            )
+        # The commit bumps the corpus version, retiring cached slug lookups
+        db.session.commit()
+        return len(updates)
+
 
-slug_service = SlugService()
\ No newline at end of file
+slug_service = SlugService()
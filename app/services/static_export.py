@@ -0,0 +1,225 @@
+"""Static export of the public pages and cacheable API responses."""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import PhraseologicalEntry
+from app.services.categories import category_service
+from app.services.images import image_service
+from app.services.page_cache import page_cache
+from app.services.related import related_service
+from app.services.sitemap import sitemap_service
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+MANIFEST = '.export-manifest.json'
+# Only text worth precompressing gets .gz/.br siblings.
+COMPRESSIBLE_SUFFIXES = ('.html', '.json', '.xml', '.txt')
+PHRASE_BATCH = 500
+# Offline output is compressed once and served many times: use the maximum
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# (url, output path relative to the export directory, input fingerprint).
+# A ``None`` fingerprint means the page is rendered on every run and only
+# written when its output changed.
+PageSpec = Tuple[str, str, Optional[str]]
+
+
+def _fingerprint(*parts) -> str:
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class StaticExporter:
+    """Service rendering ``web_bp`` pages and API JSON into a directory tree.
+
+    Layout (served by nginx with ``try_files $uri $uri/index.html $uri.json``)::
+
+        index.html, robots.txt, sitemap*.xml
+        kategoria/<slug>/index.html
+        frazeologizm/<slug>/index.html
+        api/categories.json
+        api/phrases/<id>.json, api/phrases/slug/<slug>.json
+
+    Every file gets ``.gz`` (and ``.br``) siblings for ``gzip_static``.
+    ``.export-manifest.json`` records a fingerprint of each page's inputs
+    (its phrase, related phrases, image, categories, templates and config)
+    and the hash of its output, so a re-run renders only pages whose inputs
+    changed and removes pages that no longer exist.
+    """
+
+    def _site_signature(self) -> str:
+        """Inputs shared by every page: templates, YAML config and site URL."""
+        config_files = [
+            os.path.join(current_app.root_path, name)
+            for name in ('category_config.yaml', 'seo_metadata.yaml')
+        ]
+        stats = []
+        for path in config_files:
+            try:
+                with open(path, 'rb') as f:
+                    stats.append(hashlib.sha1(f.read()).hexdigest())
+            except OSError:
+                stats.append(None)
+        return _fingerprint(
+            page_cache.get_template_signature(), stats, os.getenv('SITE_URL', 'https://frazeologizm.ru')
+        )
+
+    def iter_pages(self) -> Iterator[PageSpec]:
+        site = self._site_signature()
+        navigation = category_service.get_navigation_categories()
+        shared = _fingerprint(site, navigation)
+
+        yield '/', 'index.html', _fingerprint(shared, category_service.get_general_category())
+        yield '/robots.txt', 'robots.txt', None
+        for name in sitemap_service.get_manifest()['files']:
+            yield f'/{name}', name, None
+
+        categories = [category_service.get_general_category()] + category_service.get_all_categories_enriched()
+        for category in categories:
+            yield (
+                f'/kategoria/{category["slug"]}/',
+                f'kategoria/{category["slug"]}/index.html',
+                _fingerprint(shared, category),
+            )
+        yield '/api/categories', 'api/categories.json', _fingerprint(site, categories)
+
+        images = image_service.get_images()
+        # Rows are fetched in buffered batches: the related lookups and the
+        # renders between yields run on the same session, and would cut a
+        # streamed (unbuffered) result short
+        ids = [phrase_id for phrase_id, in db.session.query(PhraseologicalEntry.id).filter(
+            PhraseologicalEntry.slug.isnot(None)
+        ).order_by(PhraseologicalEntry.id)]
+        for start in range(0, len(ids), PHRASE_BATCH):
+            phrases = PhraseologicalEntry.query.filter(
+                PhraseologicalEntry.id.in_(ids[start:start + PHRASE_BATCH])
+            ).order_by(PhraseologicalEntry.id).all()
+            yield from self._phrase_pages(phrases, site, shared, images)
+
+    def _phrase_pages(self, phrases, site: str, shared: str, images: Dict) -> Iterator[PageSpec]:
+        for phrase in phrases:
+            row = (phrase.to_dict(), phrase.created_at, phrase.updated_at)
+            related = [
+                (p.slug, p.phrase, p.category, (p.meanings or [''])[0])
+                for p in related_service.get_related(phrase, limit=5)
+            ]
+            yield (
+                f'/frazeologizm/{phrase.slug}/',
+                f'frazeologizm/{phrase.slug}/index.html',
+                _fingerprint(shared, row, related, images.get(phrase.slug)),
+            )
+            api = _fingerprint(site, phrase.to_dict())
+            yield f'/api/phrases/{phrase.id}', f'api/phrases/{phrase.id}.json', api
+            yield f'/api/phrases/slug/{phrase.slug}', f'api/phrases/slug/{phrase.slug}.json', api
+
+    def _read_manifest(self, directory: str) -> Dict:
+        try:
+            with open(os.path.join(directory, MANIFEST), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        outputs = [(path, data)]
+        if path.endswith(COMPRESSIBLE_SUFFIXES):
+            outputs.append((f'{path}.gz', gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)))
+            if brotli is not None:
+                outputs.append((f'{path}.br', brotli.compress(data, quality=BROTLI_QUALITY)))
+        for target, body in outputs:
+            tmp_path = f'{target}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, target)
+
+    @staticmethod
+    def _remove(directory: str, relative: str) -> None:
+        path = os.path.join(directory, relative)
+        for target in (path, f'{path}.gz', f'{path}.br'):
+            if os.path.exists(target):
+                os.remove(target)
+        # Drop directories left empty (e.g. frazeologizm/<slug>/)
+        parent = os.path.dirname(path)
+        while parent != directory and os.path.isdir(parent) and not os.listdir(parent):
+            os.rmdir(parent)
+            parent = os.path.dirname(parent)
+
+    def export(self, directory: str, force: bool = False) -> Dict:
+        """Render changed pages into ``directory`` and return counts and timing."""
+        started = time.perf_counter()
+        directory = os.path.abspath(directory)
+        os.makedirs(directory, exist_ok=True)
+        previous = {} if force else self._read_manifest(directory).get('pages', {})
+
+        pages: Dict[str, Dict] = {}
+        rendered = written = unchanged = 0
+        failed: List[str] = []
+        client = current_app.test_client()
+        # Pages are compressed here; filling the page cache would do it twice
+        page_cache_enabled = current_app.config.get('PAGE_CACHE_ENABLED', False)
+        current_app.config['PAGE_CACHE_ENABLED'] = False
+        try:
+            for url, relative, fingerprint in self.iter_pages():
+                old = previous.get(relative)
+                if (fingerprint is not None and old and old.get('input') == fingerprint
+                        and os.path.exists(os.path.join(directory, relative))):
+                    pages[relative] = old
+                    unchanged += 1
+                    continue
+
+                response = client.get(url, headers={'Accept-Encoding': 'identity'})
+                rendered += 1
+                if response.status_code != 200:
+                    failed.append(f'{url} ({response.status_code})')
+                    if old:
+                        # Keep serving the last good export of this page
+                        pages[relative] = old
+                    continue
+                body = response.get_data()
+                digest = hashlib.sha1(body).hexdigest()
+                if not (old and old.get('output') == digest
+                        and os.path.exists(os.path.join(directory, relative))):
+                    self._write(os.path.join(directory, relative), body)
+                    written += 1
+                pages[relative] = {'url': url, 'input': fingerprint, 'output': digest}
+        finally:
+            current_app.config['PAGE_CACHE_ENABLED'] = page_cache_enabled
+
+        removed = 0
+        for relative in set(self._read_manifest(directory).get('pages', {})) - set(pages):
+            self._remove(directory, relative)
+            removed += 1
+
+        tmp_path = os.path.join(directory, f'{MANIFEST}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'pages': pages}, f, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, os.path.join(directory, MANIFEST))
+
+        # Release rows loaded through the ORM while walking the corpus
+        db.session.remove()
+        return {
+            'pages': len(pages),
+            'rendered': rendered,
+            'written': written,
+            'unchanged': unchanged,
+            'removed': removed,
+            'failed': failed,
+            'seconds': time.perf_counter() - started,
+        }
+
+
+static_exporter = StaticExporter()
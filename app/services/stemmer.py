@@ -0,0 +1,179 @@
+"""Tokenization and Russian stemming for the in-memory search index.
+
+``RussianStemmer`` is a pure-Python port of the Snowball Russian algorithm
+(https://snowballstem.org/algorithms/russian/stemmer.html), so the search
+index needs no compiled dependency.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+VOWELS = frozenset('аеиоуыэюя')
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    (
+        'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем', 'им',
+        'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю', 'ая',
+        'яя', 'ою', 'ею',
+    ),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = (
+    (),
+    ('ся', 'сь'),
+)
+VERB = (
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+        'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+        'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+        'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = (
+    (),
+    (
+        'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и',
+        'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о',
+        'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я',
+    ),
+)
+DERIVATIONAL = ('ость', 'ост')
+SUPERLATIVE = ('ейше', 'ейш')
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def _by_length(group: Tuple[Tuple[str, ...], Tuple[str, ...]]) -> List[Tuple[str, bool]]:
+    """Flatten an ending group to ``(ending, needs_a_or_ya)`` pairs, longest first."""
+    endings = [(e, True) for e in group[0]] + [(e, False) for e in group[1]]
+    return sorted(endings, key=lambda item: len(item[0]), reverse=True)
+
+
+class RussianStemmer:
+    """Snowball stemmer for Russian words."""
+
+    _perfective_gerund = _by_length(PERFECTIVE_GERUND)
+    _adjective = _by_length(ADJECTIVE)
+    _participle = _by_length(PARTICIPLE)
+    _reflexive = _by_length(REFLEXIVE)
+    _verb = _by_length(VERB)
+    _noun = _by_length(NOUN)
+
+    @staticmethod
+    def _regions(word: str) -> Tuple[int, int, int]:
+        """Return start offsets of the RV, R1 and R2 regions."""
+        rv = r1 = r2 = len(word)
+        for i, char in enumerate(word):
+            if char in VOWELS:
+                rv = i + 1
+                break
+        for i in range(1, len(word)):
+            if word[i - 1] in VOWELS and word[i] not in VOWELS:
+                r1 = i + 1
+                break
+        for i in range(r1 + 1, len(word)):
+            if word[i - 1] in VOWELS and word[i] not in VOWELS:
+                r2 = i + 1
+                break
+        return rv, r1, r2
+
+    @staticmethod
+    def _strip(rv: str, endings: List[Tuple[str, bool]]) -> Optional[str]:
+        """Remove the longest matching ending from ``rv``.
+
+        Returns ``None`` when nothing matched or when the longest match is a
+        group-1 ending that is not preceded by ``а``/``я``.
+        """
+        for ending, needs_a_or_ya in endings:
+            if rv.endswith(ending):
+                stem = rv[:-len(ending)]
+                if needs_a_or_ya and not stem.endswith(('а', 'я')):
+                    return None
+                return stem
+        return None
+
+    def stem(self, word: str) -> str:
+        word = word.lower().replace('ё', 'е')
+        rv_start, _, r2_start = self._regions(word)
+        if rv_start >= len(word):
+            return word
+
+        prefix, rv = word[:rv_start], word[rv_start:]
+
+        # Step 1
+        stripped = self._strip(rv, self._perfective_gerund)
+        if stripped is not None:
+            rv = stripped
+        else:
+            stripped = self._strip(rv, self._reflexive)
+            if stripped is not None:
+                rv = stripped
+            stripped = self._strip(rv, self._adjective)
+            if stripped is not None:
+                rv = stripped
+                participle = self._strip(rv, self._participle)
+                if participle is not None:
+                    rv = participle
+            else:
+                for group in (self._verb, self._noun):
+                    stripped = self._strip(rv, group)
+                    if stripped is not None:
+                        rv = stripped
+                        break
+
+        # Step 2
+        if rv.endswith('и'):
+            rv = rv[:-1]
+
+        # Step 3: derivational endings must lie inside R2
+        for ending in DERIVATIONAL:
+            if rv.endswith(ending) and rv_start + len(rv) - len(ending) >= r2_start:
+                rv = rv[:-len(ending)]
+                break
+
+        # Step 4
+        for ending in SUPERLATIVE:
+            if rv.endswith(ending):
+                rv = rv[:-len(ending)]
+                break
+        if rv.endswith('нн'):
+            rv = rv[:-1]
+        elif rv.endswith('ь'):
+            rv = rv[:-1]
+
+        return prefix + rv
+
+
+_stemmer = RussianStemmer()
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """Stem a single lowercase word (memoized)."""
+    return _stemmer.stem(word)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens with ``ё`` folded to ``е``."""
+    if not text:
+        return []
+    return TOKEN_RE.findall(text.lower().replace('ё', 'е'))
+
+
+def analyze(text: str) -> List[str]:
+    """Tokenize and stem text for indexing or querying."""
+    return [stem(token) for token in tokenize(text)]
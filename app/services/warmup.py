@@ -0,0 +1,114 @@
+"""Cache warm-up for deploys, cache flushes and freshly started workers."""
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from flask import Flask, current_app
+
+from app.services.categories import category_service
+from app.services.corpus import corpus_indexes
+from app.services.images import image_service
+from app.services.payloads import payload_service
+from app.services.phrase_ids import phrase_id_service
+from app.services.search import search_service
+from app.services.sitemap import sitemap_service
+from app.services.slug import slug_service
+
+WarmTask = Tuple[str, Callable[[], Any]]
+
+# 'shared' fills the cache backend, 'local' builds this process's in-memory
+# indexes and 'pages' renders pages and API responses through the app.
+STAGES = ('shared', 'local', 'pages')
+FRAGMENT_BATCH = 500
+
+
+class CacheWarmer:
+    """Service filling caches up front so the first visitors do not pay for them.
+
+    Stages run in order; the items of a stage run in parallel on at most
+    ``workers`` threads, each with its own app context and DB session.
+    Every item is timed, and a failing item is reported without stopping
+    the others.
+    """
+
+    def shared_tasks(self) -> List[WarmTask]:
+        tasks: List[WarmTask] = [
+            ('categories: counts', category_service.get_db_categories),
+            ('categories: total', category_service.get_total_phrase_count),
+            ('categories: enriched', category_service.get_all_categories_enriched),
+            ('categories: navigation', category_service.get_navigation_categories),
+            ('slugs: mapping', slug_service.get_slug_to_id_mapping),
+            ('search: popular', search_service.get_popular_searches),
+            ('sitemap', sitemap_service.get_manifest),
+        ]
+        ids = phrase_id_service.get_ids()
+        for start in range(0, len(ids), FRAGMENT_BATCH):
+            batch = ids[start:start + FRAGMENT_BATCH]
+            tasks.append((
+                f'phrase json: {batch[0]}-{batch[-1]}',
+                lambda batch=batch: payload_service.get_fragments(batch),
+            ))
+        return tasks
+
+    def local_tasks(self) -> List[WarmTask]:
+        # Backends are created on first use; create them so their indexes exist
+        search_service.get_backend()
+        search_service.get_backend('fuzzy')
+        tasks: List[WarmTask] = [(f'index: {index.name}', index.get) for index in corpus_indexes()]
+        tasks.append(('images: manifest', image_service.get_images))
+        return tasks
+
+    def page_tasks(self, top: int) -> List[WarmTask]:
+        urls = ['/', '/api/categories', '/api/phrases']
+        categories = [category_service.get_general_category()] + category_service.get_all_categories_enriched()
+        urls += [f'/kategoria/{category["slug"]}/' for category in categories]
+        slugs = sorted(slug_service.get_slug_to_id_mapping().items(), key=lambda item: item[1])
+        urls += [f'/frazeologizm/{slug}/' for slug, _ in slugs[:top]]
+        return [(url, lambda url=url: self._request(url)) for url in urls]
+
+    @staticmethod
+    def _request(url: str) -> None:
+        response = current_app.test_client().get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'HTTP {response.status_code}')
+
+    @staticmethod
+    def _run_task(app: Flask, stage: str, name: str, func: Callable[[], Any]) -> Dict:
+        started = time.perf_counter()
+        error = None
+        with app.app_context():
+            try:
+                func()
+            except Exception as exc:
+                app.logger.exception('Warming %s failed', name)
+                error = f'{type(exc).__name__}: {exc}'
+        return {
+            'stage': stage,
+            'name': name,
+            'ms': (time.perf_counter() - started) * 1000,
+            'error': error,
+        }
+
+    def warm(self, stages: Sequence[str] = STAGES, top: int = 100, workers: int = 4) -> List[Dict]:
+        """Run the given stages and return ``{stage, name, ms, error}`` per item."""
+        app = current_app._get_current_object()
+        results: List[Dict] = []
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            if stage == 'shared':
+                tasks = self.shared_tasks()
+            elif stage == 'local':
+                tasks = self.local_tasks()
+            else:
+                tasks = self.page_tasks(top)
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                results.extend(executor.map(
+                    lambda task: self._run_task(app, stage, *task), tasks
+                ))
+        return results
+
+
+cache_warmer = CacheWarmer()
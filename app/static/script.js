@@ -1,13 +1,19 @@
 // Phraseological Units Training Game
 
+// Questions requested per /api/quiz call, and queue size that triggers the next one
+const QUIZ_BATCH_SIZE = 10;
+const QUIZ_PREFETCH_THRESHOLD = 3;
+
 class PhraseologyTrainer {
     constructor() {
-        this.phrases = [];
-        this.allPhrases = [];
+        this.questions = [];
+        this.totalPhrases = 0;
+        this.nextOffset = 0;
+        this.pendingBatch = null;
         this.currentQuestion = null;
         this.correctAnswers = 0;
         this.totalQuestions = 0;
-        this.usedPhrases = new Set();
+        this.askedQuestions = 0;
         
         this.init();
     }
@@ -20,48 +26,20 @@ class PhraseologyTrainer {
     
     async loadPhrases() {
         try {
-            console.log('Loading phrases from API...');
+            console.log('Loading quiz questions from API...');
             
             // Get current category from URL or window variable
-            const currentCategory = window.CURRENT_CATEGORY || this.getCategoryFromURL();
-            
-            // Build API URL with parameters
-            const apiUrl = new URL(`${window.API_BASE_URL}/phrases`);
-            if (currentCategory && currentCategory !== 'general') {
-                apiUrl.searchParams.append('category', currentCategory);
-            }
-            apiUrl.searchParams.append('limit', '1000'); // Load more phrases for better quiz variety
-            
-            const response = await fetch(apiUrl.toString());
-            
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status} - ${response.statusText}`);
-            }
-            
-            const data = await response.json();
-            
-            // Store all phrases for use in generating incorrect answers
-            const allValidPhrases = data.phrases ? data.phrases.filter(phrase => {
-                return phrase.meanings && 
-                       phrase.meanings.length > 0 && 
-                       phrase.meanings[0] !== "Значение требует уточнения" &&
-                       phrase.meanings[0].trim().length > 10;
-            }) : [];
-            
-            // Filter phrases based on category (API already filtered, but ensure consistency)
-            if (currentCategory && currentCategory !== 'general') {
-                this.phrases = allValidPhrases.filter(phrase => phrase.category === currentCategory);
-                this.allPhrases = allValidPhrases; // Store all for generating incorrect options
-            } else {
-                // Use all phrases for general category
-                this.phrases = allValidPhrases;
-                this.allPhrases = allValidPhrases;
+            this.category = window.CURRENT_CATEGORY || this.getCategoryFromURL();
+            if (!this.category || this.category === 'general') {
                 window.CATEGORY_NAME = window.CATEGORY_NAME || 'Все категории';
             }
             
-            console.log(`Loaded ${this.phrases.length} valid phrases for ${window.CATEGORY_NAME}`);
+            this.resetQuestionOrder();
+            await this.loadNextBatch();
             
-            if (this.phrases.length === 0) {
+            console.log(`Loaded ${this.questions.length} of ${this.totalPhrases} questions for ${window.CATEGORY_NAME}`);
+            
+            if (this.totalPhrases === 0) {
                 throw new Error('No valid phrases found for this category');
             }
             
@@ -75,6 +53,57 @@ class PhraseologyTrainer {
         }
     }
     
+    resetQuestionOrder() {
+        // The server walks the category in an order fixed by this seed
+        this.seed = Math.floor(Math.random() * 2147483647);
+        this.questions = [];
+        this.nextOffset = 0;
+        this.pendingBatch = null;
+    }
+    
+    hasMoreQuestions() {
+        return this.questions.length > 0 || this.nextOffset !== null;
+    }
+    
+    loadNextBatch() {
+        // Only one request in flight; later callers wait for the same batch
+        if (this.pendingBatch || this.nextOffset === null) {
+            return this.pendingBatch || Promise.resolve();
+        }
+        
+        const apiUrl = new URL(`${window.API_BASE_URL}/quiz`, window.location.origin);
+        if (this.category && this.category !== 'general') {
+            apiUrl.searchParams.append('category', this.category);
+        }
+        apiUrl.searchParams.append('seed', this.seed);
+        apiUrl.searchParams.append('offset', this.nextOffset);
+        apiUrl.searchParams.append('count', QUIZ_BATCH_SIZE);
+        const seed = this.seed;
+        
+        this.pendingBatch = fetch(apiUrl.toString())
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP error! status: ${response.status} - ${response.statusText}`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                if (seed !== this.seed) {
+                    return; // Quiz was restarted while this batch was loading
+                }
+                this.questions.push(...data.questions);
+                this.totalPhrases = data.total;
+                this.nextOffset = data.next_offset;
+            })
+            .finally(() => {
+                if (seed === this.seed) {
+                    this.pendingBatch = null;
+                }
+            });
+        
+        return this.pendingBatch;
+    }
+    
     getCategoryFromURL() {
         const path = window.location.pathname;
         const filename = path.split('/').pop() || 'index.html';
@@ -124,7 +153,7 @@ class PhraseologyTrainer {
     setupEventListeners() {
         document.getElementById('next-button').addEventListener('click', () => {
             // Check if this is the last question
-            if (this.usedPhrases.size >= this.phrases.length) {
+            if (!this.hasMoreQuestions()) {
                 this.showGameComplete();
             } else {
                 this.startNewQuestion();
@@ -140,7 +169,7 @@ class PhraseologyTrainer {
         });
     }
     
-    startNewQuestion() {
+    async startNewQuestion() {
         // Hide feedback and etymology
         document.getElementById('feedback').style.display = 'none';
         document.getElementById('etymology-info').style.display = 'none';
@@ -150,28 +179,31 @@ class PhraseologyTrainer {
         document.getElementById('next-button').style.display = 'none';
         document.getElementById('restart-button').style.display = 'none';
         
-        // Check if all phrases have been used (game complete)
-        if (this.usedPhrases.size >= this.phrases.length) {
-            this.showGameComplete();
-            return;
+        if (this.questions.length === 0 && this.nextOffset !== null) {
+            try {
+                await this.loadNextBatch();
+            } catch (error) {
+                console.error('Error loading questions:', error);
+                this.showError(error);
+                return;
+            }
         }
         
-        // Get a random phrase that hasn't been used yet
-        const availablePhrases = this.phrases.filter(p => !this.usedPhrases.has(p.phrase));
-        
-        if (availablePhrases.length === 0) {
-            // This shouldn't happen with the check above, but just in case
+        // Check if all phrases have been used (game complete)
+        if (this.questions.length === 0) {
             this.showGameComplete();
             return;
         }
         
-        const randomIndex = Math.floor(Math.random() * availablePhrases.length);
-        const selectedPhrase = availablePhrases[randomIndex];
+        this.currentQuestion = this.questions.shift();
+        this.askedQuestions++;
         
-        this.currentQuestion = selectedPhrase;
-        this.usedPhrases.add(selectedPhrase.phrase);
+        // Prefetch the next batch before the queue runs dry
+        if (this.questions.length < QUIZ_PREFETCH_THRESHOLD) {
+            this.loadNextBatch().catch(error => console.error('Error prefetching questions:', error));
+        }
         
-        console.log(`Selected phrase ${this.usedPhrases.size}/${this.phrases.length}: "${selectedPhrase.phrase}"`);
+        console.log(`Selected phrase ${this.askedQuestions}/${this.totalPhrases}: "${this.currentQuestion.phrase}"`);
         
         this.displayQuestion();
         this.generateAnswerOptions();
@@ -182,92 +214,13 @@ class PhraseologyTrainer {
     }
     
     generateAnswerOptions() {
-        const correctMeaning = this.getRandomMeaning(this.currentQuestion);
-        const incorrectMeanings = this.getRandomIncorrectMeanings(correctMeaning, 2);
-        
-        // Combine and shuffle
-        const allOptions = [correctMeaning, ...incorrectMeanings];
-        this.shuffleArray(allOptions);
+        // Options arrive already shuffled, with distractors picked server-side
+        const options = this.currentQuestion.options;
         
         // Store correct answer for checking
-        this.correctAnswer = correctMeaning;
-        
-        this.displayAnswerOptions(allOptions);
-    }
-    
-    getRandomMeaning(phrase) {
-        const meanings = phrase.meanings.filter(m => 
-            m && m.trim().length > 10 && m !== "Значение требует уточнения"
-        );
-        
-        if (meanings.length === 0) {
-            return "Значение недоступно";
-        }
-        
-        return meanings[Math.floor(Math.random() * meanings.length)];
-    }
-    
-    getRandomIncorrectMeanings(correctMeaning, count) {
-        const incorrectMeanings = [];
-        
-        // First, try to get meanings from the same category
-        const sameCategoryPhrases = this.phrases.filter(p => p !== this.currentQuestion);
-        
-        // If we don't have enough phrases in the same category, use all phrases
-        let availablePhrases = sameCategoryPhrases.length >= count ? 
-            sameCategoryPhrases : 
-            this.allPhrases ? this.allPhrases.filter(p => p !== this.currentQuestion) : sameCategoryPhrases;
-        
-        // If we still don't have enough phrases, use what we have
-        if (availablePhrases.length === 0) {
-            availablePhrases = this.phrases.filter(p => p !== this.currentQuestion);
-        }
+        this.correctAnswer = options[this.currentQuestion.answer];
         
-        while (incorrectMeanings.length < count && availablePhrases.length > 0) {
-            const randomPhrase = availablePhrases[Math.floor(Math.random() * availablePhrases.length)];
-            const meaning = this.getRandomMeaning(randomPhrase);
-            
-            // Avoid duplicates and make sure it's different from correct answer
-            if (meaning !== correctMeaning && 
-                !incorrectMeanings.includes(meaning) &&
-                meaning !== "Значение недоступно") {
-                incorrectMeanings.push(meaning);
-            }
-            
-            // Remove used phrase to avoid infinite loop
-            const index = availablePhrases.indexOf(randomPhrase);
-            availablePhrases.splice(index, 1);
-        }
-        
-        // If we couldn't find enough different meanings, add some generic ones
-        while (incorrectMeanings.length < count) {
-            const genericMeanings = [
-                "выражение радости или удовлетворения",
-                "обозначение быстрого движения или действия", 
-                "описание сложной или запутанной ситуации",
-                "характеристика ненадежного человека",
-                "обозначение большого количества чего-либо",
-                "выражение недовольства или возмущения",
-                "описание красивого внешнего вида",
-                "характеристика умного человека",
-                "обозначение трудной работы",
-                "выражение согласия или одобрения"
-            ];
-            
-            const generic = genericMeanings[Math.floor(Math.random() * genericMeanings.length)];
-            if (!incorrectMeanings.includes(generic) && generic !== correctMeaning) {
-                incorrectMeanings.push(generic);
-            }
-        }
-        
-        return incorrectMeanings;
-    }
-    
-    shuffleArray(array) {
-        for (let i = array.length - 1; i > 0; i--) {
-            const j = Math.floor(Math.random() * (i + 1));
-            [array[i], array[j]] = [array[j], array[i]];
-        }
+        this.displayAnswerOptions(options);
     }
     
     displayAnswerOptions(options) {
@@ -333,7 +286,7 @@ class PhraseologyTrainer {
     
     showControls() {
         // Check if this was the last question
-        const isLastQuestion = this.usedPhrases.size >= this.phrases.length;
+        const isLastQuestion = !this.hasMoreQuestions();
         
         // Handle next button visibility and text
         const nextButton = document.getElementById('next-button');
@@ -375,7 +328,7 @@ class PhraseologyTrainer {
         document.getElementById('correct-count').textContent = this.correctAnswers;
         
         // Show progress more clearly
-        const progressText = `${this.totalQuestions} / ${this.phrases.length}`;
+        const progressText = `${this.totalQuestions} / ${this.totalPhrases}`;
         document.getElementById('total-count').textContent = progressText;
         
         const accuracy = this.totalQuestions > 0 ? 
@@ -383,7 +336,7 @@ class PhraseologyTrainer {
         document.getElementById('accuracy').textContent = `${accuracy}%`;
         
         // Update progress indicator if near completion
-        const remaining = this.phrases.length - this.usedPhrases.size;
+        const remaining = this.totalPhrases - this.askedQuestions;
         if (remaining <= 3 && remaining > 0) {
             const totalCountElement = document.getElementById('total-count');
             totalCountElement.style.color = '#f59e0b';
@@ -394,7 +347,8 @@ class PhraseologyTrainer {
     restart() {
         this.correctAnswers = 0;
         this.totalQuestions = 0;
-        this.usedPhrases.clear();
+        this.askedQuestions = 0;
+        this.resetQuestionOrder();
         
         // Reset stats styling
         const totalCountElement = document.getElementById('total-count');
@@ -487,7 +441,7 @@ class PhraseologyTrainer {
                             <div class="final-stat-label">Точность</div>
                         </div>
                         <div class="final-stat">
-                            <div class="final-stat-value">${this.phrases.length}</div>
+                            <div class="final-stat-value">${this.totalPhrases}</div>
                             <div class="final-stat-label">Изучено фразеологизмов</div>
                         </div>
                     </div>
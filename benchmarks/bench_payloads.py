@@ -0,0 +1,90 @@
+"""Benchmark phrase list serialization: ``to_dict()`` + ``jsonify`` vs cached fragments.
+
+Run from the repository root::
+
+    python benchmarks/bench_payloads.py [--phrases 5000] [--repeat 50]
+
+Uses the testing configuration (in-memory SQLite, simple cache) filled with
+synthetic phrases, and prints the median time per response size.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Read by app.config at import time; keeps SQL echo off
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+from flask import jsonify  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import cache, db  # noqa: E402
+from app.models import PhraseologicalEntry  # noqa: E402
+from app.services.payloads import orjson, payload_service  # noqa: E402
+
+SIZES = (20, 200, 1000)
+
+
+def seed(count):
+    db.session.execute(db.insert(PhraseologicalEntry), [
+        {
+            'phrase': f'фразеологизм номер {i}',
+            'slug': f'frazeologizm-nomer-{i}',
+            'meanings': [f'значение фразеологизма {i}', 'второе значение'],
+            'etymology': f'Происхождение выражения {i} связано с народной речью.',
+            'category': 'general',
+        }
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def baseline(size):
+    phrases = PhraseologicalEntry.query.order_by(PhraseologicalEntry.id).limit(size).all()
+    return jsonify({'phrases': [p.to_dict() for p in phrases], 'total': size}).get_data()
+
+
+def fragments(size):
+    ids = [row.id for row in db.session.query(PhraseologicalEntry.id)
+           .order_by(PhraseologicalEntry.id).limit(size)]
+    return payload_service.render(payload_service.get_fragments(ids), total=size)
+
+
+def measure(func, size, repeat, clear=False):
+    timings = []
+    for _ in range(repeat):
+        if clear:
+            cache.clear()
+        db.session.expunge_all()
+        started = time.perf_counter()
+        func(size)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--phrases', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    with app.test_request_context():
+        db.create_all()
+        seed(args.phrases)
+
+        print(f"encoder: {'orjson' if orjson else 'json'}, phrases: {args.phrases}")
+        print(f"{'size':>6} {'to_dict+jsonify':>16} {'fragments cold':>15} {'fragments warm':>15} {'speedup':>8}")
+        for size in SIZES:
+            assert len(fragments(size)) > 0
+            old = measure(baseline, size, args.repeat)
+            cold = measure(fragments, size, args.repeat, clear=True)
+            fragments(size)
+            warm = measure(fragments, size, args.repeat)
+            print(f'{size:>6} {old:>13.2f} ms {cold:>12.2f} ms {warm:>12.2f} ms {old / warm:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
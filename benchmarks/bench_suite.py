@@ -0,0 +1,478 @@
+"""Benchmark every route, a threaded load run and the text helpers on a seeded database.
+
+Run from the repository root::
+
+    python benchmarks/bench_suite.py [--scale 10] [--output benchmarks/results/run.json]
+    python benchmarks/bench_suite.py --baseline benchmarks/results/run.json
+
+The database is seeded from ``table_phrases_semantic_fixed.json`` through the
+corpus loader; ``--scale N`` adds N-1 numbered synthetic copies of every
+phrase. By default a fresh SQLite file in a temporary directory is used;
+``--database`` takes any SQLAlchemy URL (e.g. a local MySQL database), which
+is seeded only if its table is empty.
+
+Three sections are measured, each can be picked with ``--only``:
+
+* ``routes``: every ``web_bp``/``api_bp`` endpoint through the test client,
+  one cold request after a cache flush, then ``--repeat`` warm ones;
+* ``load``: ``--threads`` threads, each with its own test client, cycling
+  through all routes for ``--duration`` seconds. Threads share one process
+  (and its GIL), so this measures contention in the app, not HTTP serving;
+* ``text``: ``normalize_text``, ``slugify`` and ``search_in_text`` on large
+  texts built from the corpus.
+
+Latencies are reported as p50/p95/p99 in milliseconds together with SQL
+statements per request. ``--output`` saves the results as JSON; with
+``--baseline`` they are compared to an earlier file and the script exits
+with status 1 when something got slower by more than ``--tolerance`` or
+issues more queries (status 2 if the runs used different corpus sizes).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+CORPUS = os.path.join(ROOT, 'table_phrases_semantic_fixed.json')
+SECTIONS = ('routes', 'load', 'text')
+
+# Below these absolute differences a change is treated as noise
+MIN_DELTA_MS = 0.5
+TEXT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', help='SQLAlchemy URL (default: a temporary SQLite file).')
+    parser.add_argument('--scale', type=int, default=1, help='Copies of the corpus to load.')
+    parser.add_argument('--only', default=','.join(SECTIONS), help='Comma-separated sections to run.')
+    parser.add_argument('--repeat', type=int, default=50, help='Warm requests per route.')
+    parser.add_argument('--threads', type=int, default=8, help='Load generator threads.')
+    parser.add_argument('--duration', type=float, default=10.0, help='Load run length in seconds.')
+    parser.add_argument('--output', help='Write the results to this JSON file.')
+    parser.add_argument('--baseline', help='Compare with an earlier JSON result file.')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed relative slowdown before a regression is reported.')
+    args = parser.parse_args()
+    args.only = [name for name in args.only.split(',') if name]
+    unknown = set(args.only) - set(SECTIONS)
+    if unknown:
+        parser.error(f"unknown section(s): {', '.join(sorted(unknown))}")
+    return args
+
+
+def percentiles(samples):
+    """Summary of millisecond samples."""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+    if len(ordered) > 1:
+        cuts = statistics.quantiles(ordered, n=100, method='inclusive')
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = ordered[0]
+    return {
+        'count': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+        'p50_ms': round(p50, 3),
+        'p95_ms': round(p95, 3),
+        'p99_ms': round(p99, 3),
+        'min_ms': round(ordered[0], 3),
+        'max_ms': round(ordered[-1], 3),
+    }
+
+
+class QueryCounter:
+    """Counts SQL statements per thread, so concurrent requests do not mix."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def install(self):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+        event.listen(Engine, 'after_cursor_execute', self._count)
+
+    def _count(self, *args, **kwargs):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, 'count', 0)
+
+
+queries = QueryCounter()
+
+
+# Setup
+
+def scaled_records(scale):
+    from app.services.corpus_loader import iter_corpus
+    records = list(iter_corpus(CORPUS))
+    yield from records
+    for copy in range(2, scale + 1):
+        for record in records:
+            yield {**record, 'phrase': f"{record['phrase']} {copy}"}
+
+
+def prepare(args, workdir):
+    """Create the app, seed the database and return it with a few sample values."""
+    os.environ['TEST_DATABASE_URL'] = args.database or f"sqlite:///{os.path.join(workdir, 'bench.sqlite3')}"
+    # Read by app.config at import time; keeps SQL echo off
+    os.environ.setdefault('FLASK_ENV', 'testing')
+    from app import create_app
+    from app.extensions import db
+    from app.models import PhraseologicalEntry
+    from app.services.corpus_loader import corpus_loader
+
+    app = create_app('testing')
+    app.config['SITEMAP_DIR'] = os.path.join(workdir, 'sitemaps')
+
+    with app.app_context():
+        db.create_all()
+        existing = db.session.query(PhraseologicalEntry.id).count()
+        if existing:
+            print(f'Using the {existing} phrase(s) already in the database.')
+            seeded = None
+        else:
+            seeded = corpus_loader.load(scaled_records(args.scale), delete=False)
+            print(f"Seeded {seeded['inserted']} phrase(s) in {seeded['seconds']:.1f} s.")
+        rows = db.session.query(PhraseologicalEntry.id, PhraseologicalEntry.slug).order_by(
+            PhraseologicalEntry.id
+        ).all()
+        categories = [category for category, in db.session.query(PhraseologicalEntry.category)
+                      .filter(PhraseologicalEntry.category.isnot(None)).distinct()]
+        from app.services.categories import category_service
+        category_slugs = [category_service.get_general_category()['slug']] + [
+            category['slug'] for category in category_service.get_all_categories_enriched()
+        ]
+        phrases = [phrase for phrase, in db.session.query(PhraseologicalEntry.phrase)
+                   .order_by(PhraseologicalEntry.id).limit(2000)]
+
+    queries.install()
+    return app, {
+        'phrase_count': len(rows),
+        'seeded': seeded is not None,
+        'ids': [row.id for row in rows],
+        'slugs': [row.slug for row in rows],
+        'categories': sorted(categories),
+        'category_slugs': category_slugs,
+        'phrases': phrases,
+    }
+
+
+def sample_text(phrases, size):
+    """Prose-like text of ``size`` characters with corpus phrases mixed in."""
+    filler = ('Вечером мы долго говорили о работе, погоде и планах на лето. '
+              'Никто не знал, чем закончится этот разговор, ')
+    parts = []
+    length = index = 0
+    while length < size:
+        part = f'{filler}{phrases[index % len(phrases)]}. '
+        parts.append(part)
+        length += len(part)
+        index += 7
+    return ''.join(parts)[:size]
+
+
+def route_cases(sample):
+    """Requests covering every web and API endpoint: ``{endpoint: [(method, url, data), ...]}``.
+
+    Several URLs per endpoint make the load run touch more than one cache key.
+    """
+    ids = sample['ids']
+    slugs = sample['slugs']
+    picks = [len(ids) * share // 10 for share in range(10)]
+    some_ids = [ids[i] for i in picks]
+    some_slugs = [slugs[i] for i in picks]
+    category = sample['categories'][0] if sample['categories'] else 'general'
+    text = sample_text(sample['phrases'], 2000)
+
+    def get(*urls):
+        return [('GET', url, None) for url in urls]
+
+    return {
+        'web.home': get('/'),
+        'web.category_page': get(*(f'/kategoria/{slug}/' for slug in sample['category_slugs'])),
+        'web.phrase_detail': get(*(f'/frazeologizm/{slug}/' for slug in some_slugs)),
+        'web.search': get('/search?q=рука', '/search?q=голова', '/search?q=вода&page=2'),
+        'web.search_in_text': get(f'/search/text?text={text[:300]}') + [('POST', '/search/text', {'text': text})],
+        'web.sitemap': get('/sitemap.xml'),
+        'web.sitemap_part': get('/sitemap-pages.xml', '/sitemap-phrases-1.xml'),
+        'web.robots': get('/robots.txt'),
+        'api.get_phrases': get(
+            '/api/phrases?limit=20',
+            f'/api/phrases?category={category}&limit=50&offset=20',
+            '/api/phrases?limit=100&fields=id,phrase,meanings&format=columnar',
+            '/api/phrases?random=true&seed=7&limit=20',
+        ),
+        'api.search_phrases': get('/api/phrases/search?q=рука', '/api/phrases/search?q=глаз&limit=50'),
+        'api.get_phrases_batch': get(
+            f"/api/phrases/batch?ids={','.join(map(str, some_ids))}",
+            f"/api/phrases/batch?slugs={','.join(some_slugs[:5])}",
+        ),
+        'api.get_phrase': get(*(f'/api/phrases/{phrase_id}' for phrase_id in some_ids)),
+        'api.get_phrase_by_slug': get(*(f'/api/phrases/slug/{slug}' for slug in some_slugs)),
+        'api.get_categories': get('/api/categories'),
+        'api.search_autocomplete': get('/api/search?q=би', '/api/search?q=вод', '/api/search?q=как'),
+        'api.get_quiz': get('/api/quiz?seed=1', f'/api/quiz?category={category}&seed=2&count=20'),
+        'api.get_metrics': get('/api/metrics'),
+        'api.health_check': get('/api/health'),
+    }
+
+
+def missing_endpoints(app, cases):
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules()
+                 if rule.endpoint.startswith(('web.', 'api.'))}
+    return sorted(endpoints - set(cases))
+
+
+def send(client, method, url, data):
+    queries.reset()
+    started = time.perf_counter()
+    response = client.open(url, method=method, data=data)
+    body = response.get_data()
+    elapsed = (time.perf_counter() - started) * 1000
+    return response.status_code, elapsed, queries.count, len(body)
+
+
+# Sections
+
+def bench_routes(app, cases, repeat):
+    from app.extensions import cache
+    client = app.test_client()
+    results = {}
+    for endpoint, requests in cases.items():
+        with app.app_context():
+            cache.clear()
+        statuses = set()
+        cold = []
+        cold_queries = []
+        for method, url, data in requests:
+            status, elapsed, count, _ = send(client, method, url, data)
+            statuses.add(status)
+            cold.append(elapsed)
+            cold_queries.append(count)
+
+        warm = []
+        warm_queries = []
+        sizes = []
+        for i in range(repeat):
+            method, url, data = requests[i % len(requests)]
+            status, elapsed, count, size = send(client, method, url, data)
+            statuses.add(status)
+            warm.append(elapsed)
+            warm_queries.append(count)
+            sizes.append(size)
+
+        results[endpoint] = {
+            **percentiles(warm),
+            'cold_ms': round(statistics.fmean(cold), 3),
+            'cold_queries_per_request': round(statistics.fmean(cold_queries), 2),
+            'queries_per_request': round(statistics.fmean(warm_queries), 2),
+            'bytes': int(statistics.fmean(sizes)),
+            'statuses': sorted(statuses),
+        }
+        row = results[endpoint]
+        print(f"{endpoint:<26} {row['cold_ms']:>9.2f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+              f"{row['p99_ms']:>8.2f} {row['cold_queries_per_request']:>6.1f} {row['queries_per_request']:>6.1f} "
+              f"{','.join(map(str, row['statuses']))}")
+    return results
+
+
+def bench_load(app, cases, threads, duration):
+    """Run all routes from ``threads`` threads for ``duration`` seconds, after one warm-up pass."""
+    mix = [request for requests in cases.values() for request in requests]
+    # Measure the steady state, not the first render of every page
+    client = app.test_client()
+    for method, url, data in mix:
+        send(client, method, url, data)
+
+    samples = [[] for _ in range(threads)]
+    stop = threading.Event()
+    start = threading.Barrier(threads + 1)
+
+    def worker(index):
+        client = app.test_client()
+        own = samples[index]
+        position = index * 7
+        start.wait()
+        while not stop.is_set():
+            method, url, data = mix[position % len(mix)]
+            position += 1
+            status, elapsed, count, _ = send(client, method, url, data)
+            own.append((elapsed, count, status))
+
+    pool = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    flat = [sample for own in samples for sample in own]
+    errors = sum(1 for _, _, status in flat if status >= 500)
+    result = {
+        **percentiles([ms for ms, _, _ in flat]),
+        'threads': threads,
+        'seconds': round(elapsed, 2),
+        'throughput_rps': round(len(flat) / elapsed, 1),
+        'queries_per_request': round(statistics.fmean([n for _, n, _ in flat]), 2) if flat else 0,
+        'errors': errors,
+    }
+    print(f"{result['count']} requests on {threads} threads in {result['seconds']} s: "
+          f"{result['throughput_rps']} req/s, p50 {result.get('p50_ms')} ms, p95 {result.get('p95_ms')} ms, "
+          f"p99 {result.get('p99_ms')} ms, {result['queries_per_request']} queries/request, {errors} error(s)")
+    return result
+
+
+def bench_text(app, sample):
+    from slugify import slugify
+    from app.services.search import search_service
+
+    def timed(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    results = {}
+    with app.app_context():
+        # Build the phrase automaton outside the measurements
+        search_service.search_in_text(sample['phrases'][0])
+        phrases = sample['phrases']
+        cases = [('slugify corpus phrases', lambda: [slugify(phrase) for phrase in phrases])]
+        for size in TEXT_SIZES:
+            text = sample_text(phrases, size)
+            label = f'{size // 1000}k chars'
+            cases += [
+                (f'normalize_text {label}', lambda text=text: search_service.normalize_text(text)),
+                (f'slugify {label}', lambda text=text: slugify(text)),
+                (f'search_in_text {label}', lambda text=text: search_service.search_in_text(text)),
+            ]
+        for name, func in cases:
+            repeat = 3 if '1000k' in name else 10
+            results[name] = percentiles(timed(func, repeat))
+            print(f"{name:<30} {results[name]['p50_ms']:>10.2f} ms")
+    return results
+
+
+# Comparison
+
+def compare(results, baseline, tolerance):
+    """Return the regressions of ``results`` against ``baseline`` as printable lines."""
+    regressions = []
+
+    def slower(name, metric, old, new):
+        if old is None or new is None:
+            return
+        if new > old * (1 + tolerance) and new - old > MIN_DELTA_MS:
+            regressions.append(f'{name}: {metric} {old:.2f} -> {new:.2f} ms (+{(new / old - 1) * 100:.0f}%)')
+
+    for endpoint, old in baseline.get('routes', {}).items():
+        new = results.get('routes', {}).get(endpoint)
+        if not new:
+            continue
+        # Cold timings are single requests, too noisy to gate on; their query counts are not
+        slower(endpoint, 'p95', old.get('p95_ms'), new.get('p95_ms'))
+        for metric in ('queries_per_request', 'cold_queries_per_request'):
+            if metric in old and new.get(metric, 0) > old[metric]:
+                regressions.append(f'{endpoint}: {metric} {old[metric]} -> {new[metric]}')
+
+    old, new = baseline.get('load'), results.get('load')
+    if old and new:
+        if new['throughput_rps'] < old['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"load: throughput {old['throughput_rps']} -> {new['throughput_rps']} req/s")
+        slower('load', 'p95', old.get('p95_ms'), new.get('p95_ms'))
+        if new['errors'] > old['errors']:
+            regressions.append(f"load: errors {old['errors']} -> {new['errors']}")
+
+    for name, old in baseline.get('text', {}).items():
+        new = results.get('text', {}).get(name)
+        # The fastest run is the least noisy figure for pure CPU work
+        if new:
+            slower(name, 'min', old.get('min_ms'), new.get('min_ms'))
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix='bench-') as workdir:
+        app, sample = prepare(args, workdir)
+        results = {
+            'meta': {
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'database': app.config['SQLALCHEMY_DATABASE_URI'].split('@')[-1] if args.database else 'sqlite (temporary file)',
+                'scale': args.scale if sample['seeded'] else None,
+                'phrases': sample['phrase_count'],
+                'page_cache': bool(app.config.get('PAGE_CACHE_ENABLED')),
+                'repeat': args.repeat,
+            },
+        }
+        cases = route_cases(sample)
+        uncovered = missing_endpoints(app, cases)
+        if uncovered:
+            print(f"Endpoints without a benchmark case: {', '.join(uncovered)}")
+            results['meta']['uncovered'] = uncovered
+
+        if 'routes' in args.only:
+            print(f"\n{'endpoint':<26} {'cold ms':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'cold q':>6} {'q':>6} status")
+            results['routes'] = bench_routes(app, cases, args.repeat)
+        if 'load' in args.only:
+            print()
+            results['load'] = bench_load(app, cases, args.threads, args.duration)
+        if 'text' in args.only:
+            print()
+            results['text'] = bench_text(app, sample)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'\nResults written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('phrases') != results['meta']['phrases']:
+            print(f"\nCannot compare: the baseline ran on {baseline['meta'].get('phrases')} phrases, "
+                  f"this run on {results['meta']['phrases']}.")
+            sys.exit(2)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) against {args.baseline}:')
+            for line in regressions:
+                print(f'  {line}')
+            sys.exit(1)
+        print(f'\nNo regressions against {args.baseline}.')
+
+
+if __name__ == '__main__':
+    main()
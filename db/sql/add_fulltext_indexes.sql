@@ -1,30 +1,26 @@
 -- SQL script to add fulltext indexes for improved search performance
--- Run this script manually on your MySQL database if needed
+-- Run this script manually on your MySQL database if needed.
+-- The indexes back the 'fulltext' search backend (SEARCH_BACKEND=fulltext).
 
--- Create fulltext index for phrase column
--- Note: Requires InnoDB engine and MySQL 5.6+ or MariaDB 10.0+
-ALTER TABLE phraseological_dict ADD FULLTEXT(phrase);
+-- Note: Requires InnoDB engine and MySQL 5.7.6+ (ngram parser for Cyrillic).
+-- The ngram parser splits text into ngram_token_size-character tokens
+-- (default 2), which works for Russian without a stemmer.
 
--- Create fulltext index for meanings column (JSON cast to text)
--- This might need adjustments based on your MySQL version
--- ALTER TABLE phraseological_dict ADD FULLTEXT(CAST(meanings AS CHAR));
+-- meanings is JSON, which cannot be FULLTEXT-indexed directly, so expose it
+-- as a generated text column that MySQL keeps in sync on every write.
+ALTER TABLE phraseological_dict ADD COLUMN meanings_text TEXT
+    GENERATED ALWAYS AS (CAST(meanings AS CHAR)) STORED;
 
--- Create fulltext index for etymology column
-ALTER TABLE phraseological_dict ADD FULLTEXT(etymology);
-
--- Combined fulltext index for better search performance
-ALTER TABLE phraseological_dict ADD FULLTEXT search_index(phrase, etymology);
-
--- Alternative: If you want to include meanings, you might need to create a generated column
--- ALTER TABLE phraseological_dict ADD COLUMN meanings_text TEXT 
--- GENERATED ALWAYS AS (JSON_UNQUOTE(JSON_EXTRACT(meanings, '$[0]'))) STORED;
--- ALTER TABLE phraseological_dict ADD FULLTEXT(phrase, meanings_text, etymology);
+-- One FULLTEXT index per searchable column: MATCH() must name exactly the
+-- columns of an index, and the backend scores each field separately.
+ALTER TABLE phraseological_dict ADD FULLTEXT INDEX ft_phrase (phrase) WITH PARSER ngram;
+ALTER TABLE phraseological_dict ADD FULLTEXT INDEX ft_meanings_text (meanings_text) WITH PARSER ngram;
+ALTER TABLE phraseological_dict ADD FULLTEXT INDEX ft_etymology (etymology) WITH PARSER ngram;
 
 -- Regular indexes for better performance on common queries
 CREATE INDEX idx_phrase_category ON phraseological_dict(category);
 CREATE INDEX idx_phrase_created_at ON phraseological_dict(created_at);
 CREATE INDEX idx_phrase_updated_at ON phraseological_dict(updated_at);
 
--- For slug-based lookups (if you add a slug column in the future)
--- ALTER TABLE phraseological_dict ADD COLUMN slug VARCHAR(255) GENERATED ALWAYS AS (LOWER(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(phrase, ' ', '-'), ',', ''), '.', ''), '!', ''), '?', ''))) STORED;
--- CREATE INDEX idx_phrase_slug ON phraseological_dict(slug);
\ No newline at end of file
+-- For slug-based lookups see add_slug_column.sql (slugs are transliterated
+-- in Python, so the column is filled by the application, not generated).
@@ -0,0 +1,15 @@
+-- SQL script to add the related-phrases neighbour table
+-- Run this script manually on your MySQL database, then fill the table with:
+--   flask --app app related-build
+
+CREATE TABLE phrase_neighbors (
+    phrase_id INT NOT NULL,
+    `rank` SMALLINT NOT NULL,
+    neighbor_id INT NOT NULL,
+    score FLOAT NOT NULL,
+    PRIMARY KEY (phrase_id, `rank`),
+    CONSTRAINT fk_neighbors_phrase FOREIGN KEY (phrase_id)
+        REFERENCES phraseological_dict(id) ON DELETE CASCADE,
+    CONSTRAINT fk_neighbors_neighbor FOREIGN KEY (neighbor_id)
+        REFERENCES phraseological_dict(id) ON DELETE CASCADE
+);
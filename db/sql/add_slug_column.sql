@@ -0,0 +1,9 @@
+-- SQL script to add the persisted slug column to phraseological_dict
+-- Run this script manually on your MySQL database, then fill the column with:
+--   flask --app app backfill-slugs
+
+ALTER TABLE phraseological_dict ADD COLUMN slug VARCHAR(255) NULL AFTER phrase;
+CREATE UNIQUE INDEX idx_phrase_slug ON phraseological_dict(slug);
+
+-- Optional: once every row has a slug, forbid NULLs
+-- ALTER TABLE phraseological_dict MODIFY COLUMN slug VARCHAR(255) NOT NULL;
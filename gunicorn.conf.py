@@ -0,0 +1,25 @@
+"""Gunicorn settings: ``gunicorn -c gunicorn.conf.py wsgi:app``."""
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', 4))
+
+
+def post_worker_init(worker):
+    """Build the worker's in-memory indexes before it accepts requests.
+
+    Enabled with ``CACHE_WARM_ON_START=true``. Shared cache entries and pages
+    are warmed once per deploy with ``flask cache-warm`` instead of by every
+    worker.
+    """
+    app = worker.wsgi
+    if not app.config.get('CACHE_WARM_ON_START'):
+        return
+
+    from app.services.warmup import cache_warmer
+
+    with app.app_context():
+        results = cache_warmer.warm(stages=('local',))
+    worker.log.info(
+        'Warmed %d index(es) in %.0f ms', len(results), sum(item['ms'] for item in results)
+    )
@@ -31,6 +31,9 @@ class PhraseologyTrainer {
                 apiUrl.searchParams.append('category', currentCategory);
             }
             apiUrl.searchParams.append('limit', '1000'); // Load more phrases for better quiz variety
+            // Only the fields the trainer renders, as one array per field
+            apiUrl.searchParams.append('fields', 'phrase,meanings,etymology,category');
+            apiUrl.searchParams.append('format', 'columnar');
             
             const response = await fetch(apiUrl.toString());
             
@@ -39,14 +42,20 @@ class PhraseologyTrainer {
             }
             
             const data = await response.json();
+            const columns = data.phrases || {};
+            const phrases = (columns.phrase || []).map((_, i) => {
+                const phrase = {};
+                data.fields.forEach(field => { phrase[field] = columns[field][i]; });
+                return phrase;
+            });
             
             // Store all phrases for use in generating incorrect answers
-            const allValidPhrases = data.phrases ? data.phrases.filter(phrase => {
+            const allValidPhrases = phrases.filter(phrase => {
                 return phrase.meanings && 
                        phrase.meanings.length > 0 && 
                        phrase.meanings[0] !== "Значение требует уточнения" &&
                        phrase.meanings[0].trim().length > 10;
-            }) : [];
+            });
             
             // Filter phrases based on category (API already filtered, but ensure consistency)
             if (currentCategory && currentCategory !== 'general') {
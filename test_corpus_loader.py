@@ -0,0 +1,107 @@
+"""Tests for the corpus loader's diff and slug reservation (run with pytest)."""
+import os
+
+# Set environment variables before importing app
+os.environ['FLASK_ENV'] = 'testing'
+os.environ.pop('TEST_DATABASE_URL', None)
+
+import pytest  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import PhraseologicalEntry  # noqa: E402
+from app.services.corpus_loader import corpus_loader  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def app():
+    return create_app('testing')
+
+
+@pytest.fixture
+def session(app):
+    with app.app_context():
+        db.create_all()
+        yield db.session
+        db.session.remove()
+        db.drop_all()
+
+
+def add_rows(session, *rows):
+    """Insert ``(phrase, slug, category)`` rows; a ``None`` slug is stored as NULL."""
+    entries = [PhraseologicalEntry(phrase=phrase, slug=slug or f'tmp-{i}', category=category)
+               for i, (phrase, slug, category) in enumerate(rows)]
+    session.add_all(entries)
+    session.commit()
+    for entry, (_, slug, _) in zip(entries, rows):
+        if slug is None:
+            session.execute(db.update(PhraseologicalEntry)
+                            .where(PhraseologicalEntry.id == entry.id).values(slug=None))
+    session.commit()
+    return [entry.id for entry in entries]
+
+
+def slugs(session):
+    return dict(session.query(PhraseologicalEntry.phrase, PhraseologicalEntry.slug))
+
+
+def test_updated_rows_can_swap_slugs(session):
+    kot, kit = PhraseologicalEntry.make_slug('кот'), PhraseologicalEntry.make_slug('кит')
+    # Each row holds the other's slug; re-spelling both regenerates them
+    add_rows(session, ('Кот', kit, None), ('Кит', kot, None))
+
+    report = corpus_loader.load([{'phrase': 'кот'}, {'phrase': 'кит'}])
+
+    assert report['updated'] == 2
+    assert slugs(session) == {'кот': kot, 'кит': kit}
+
+
+def test_kept_slug_is_reserved_before_reslugging(session):
+    base = PhraseologicalEntry.make_slug('ёж')
+    # The NULL-slug row comes first and would generate the slug the second row keeps
+    add_rows(session, ('ёж', None, None), (base, base, None))
+
+    report = corpus_loader.load([
+        {'phrase': 'ёж'},
+        {'phrase': base, 'category': 'animals'},
+    ])
+
+    assert report['updated'] == 2
+    assert slugs(session) == {'ёж': f'{base}-2', base: base}
+
+
+def test_rerun_of_unchanged_file_writes_nothing(session):
+    records = [
+        {'phrase': 'бить баклуши', 'meanings': ['бездельничать'], 'category': 'work'},
+        {'phrase': 'как с гуся вода', 'etymology': 'Из народной речи.'},
+    ]
+    corpus_loader.load(records)
+
+    writes = []
+
+    def count_writes(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')):
+            writes.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count_writes)
+    try:
+        report = corpus_loader.load(records)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count_writes)
+
+    assert (report['inserted'], report['updated'], report['deleted']) == (0, 0, 0)
+    assert report['unchanged'] == 2
+    assert writes == []
+
+
+def test_keep_missing_reserves_orphan_slugs(session):
+    kot = PhraseologicalEntry.make_slug('кот')
+    add_rows(session, ('кот', kot, None))
+
+    # Not the same phrase, but slugified the same way
+    report = corpus_loader.load([{'phrase': 'кот!'}], delete=False)
+
+    assert (report['inserted'], report['deleted']) == (1, 0)
+    assert slugs(session) == {'кот': kot, 'кот!': f'{kot}-2'}